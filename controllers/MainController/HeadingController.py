@@ -0,0 +1,67 @@
+"""
+File:           HeadingController.py
+Date:           October 2026
+Description:    PID controller of the robot's heading.
+                It gives, at each tick, the speed difference between the two sides of the track
+                needed to reduce the angle between the heading of the robot and its destination.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+
+class HeadingController:
+    """
+    PID controller of the robot's heading, updated once per tick.
+    The error is the angle (in degrees, in [-180, 180[) between the heading of the robot and its destination,
+    the output is the speed difference between the two sides of the track.
+    """
+
+    def __init__(self, kp: float, ki: float, kd: float, max_output: float):
+        """
+        Initialize the controller.
+
+        Args:
+            kp (float): Proportional gain.
+            ki (float): Integral gain.
+            kd (float): Derivative gain.
+            max_output (float): Maximum absolute value of the output (the integral term is limited to it too).
+        """
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.max_output = max_output
+
+        self.integral = 0.0
+        self.previous_error = None
+
+    def reset(self):
+        """
+        Forget the past errors (to call when the destination changes).
+        """
+        self.integral = 0.0
+        self.previous_error = None
+
+    def update(self, error: float, dt: float) -> float:
+        """
+        Do one control update.
+
+        Args:
+            error (float): The angle (in degrees) between the heading of the robot and its destination.
+            dt (float): The time (in seconds) since the last update.
+
+        Returns:
+            float: The speed difference between the two sides of the track, in [-max_output, max_output].
+        """
+        # Integral term, limited to avoid the windup during the long turns
+        if self.ki:
+            self.integral += error * dt
+            limit = self.max_output / self.ki
+            self.integral = max(-limit, min(limit, self.integral))
+
+        derivative = 0.0
+        if self.previous_error is not None and dt > 0:
+            derivative = (error - self.previous_error) / dt
+        self.previous_error = error
+
+        output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        return max(-self.max_output, min(self.max_output, output))
@@ -0,0 +1,88 @@
+"""
+File:           Heartbeat.py
+Date:           October 2026
+Description:    Adaptive period of the heartbeat (REPORT_STATUS asking who's nearby).
+                While the neighborhood and the statuses don't change, the period grows exponentially up to a maximum,
+                as soon as a change is seen it goes back to the minimum (a heartbeat already planned sooner is kept,
+                a change never delays it). Each period is jittered, so the robots started together don't send their
+                heartbeats at the same time. Times are in simulation time.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import random
+
+
+class Heartbeat:
+    """
+    Timer of the heartbeat, with an exponential backoff while nothing changes.
+    """
+
+    def __init__(self, min_period: float, max_period: float, backoff: float = 2.0, jitter: float = 0.2,
+                 seed=None):
+        """
+        Initialize the timer, the first heartbeat is due after the minimum period.
+
+        Args:
+            min_period (float): Period (in seconds) after a change.
+            max_period (float): Maximum period (in seconds) while nothing changes.
+            backoff (float): Factor applied to the period after each heartbeat without change.
+            jitter (float): Relative variation of each period, drawn in [-jitter, +jitter].
+            seed: Seed of the jitter (the name of the robot gives each robot its own sequence).
+        """
+        self.min_period = min_period
+        self.max_period = max_period
+        self.backoff = backoff
+        self.jitter = jitter
+        self.random = random.Random(seed)
+
+        self.period = min_period
+        # Simulation time of the next heartbeat (None until the first call), and the last state seen
+        self.next_time = None
+        self.state = None
+
+    def observe(self, state, now: float):
+        """
+        Give the current state of what the heartbeat watches. If it changed, the period goes back to the minimum.
+
+        Args:
+            state: Any comparable value changing when the neighborhood or the statuses change.
+            now (float): The current simulation time.
+        """
+        if state != self.state:
+            self.state = state
+            self.reset(now)
+
+    def reset(self, now: float):
+        """
+        Go back to the minimum period, the next heartbeat is due after it (or sooner if it was already planned sooner).
+
+        Args:
+            now (float): The current simulation time.
+        """
+        self.period = self.min_period
+        next_time = now + self._jittered(self.period)
+        if self.next_time is None or next_time < self.next_time:
+            self.next_time = next_time
+
+    def is_due(self, now: float) -> bool:
+        """
+        Check if the heartbeat has to be sent now. If so, the next one is planned after a longer period.
+
+        Args:
+            now (float): The current simulation time.
+
+        Returns:
+            bool: True if the heartbeat has to be sent.
+        """
+        if self.next_time is None:
+            self.reset(now)
+        if now < self.next_time:
+            return False
+
+        self.period = min(self.period * self.backoff, self.max_period)
+        self.next_time = now + self._jittered(self.period)
+        return True
+
+    def _jittered(self, period: float) -> float:
+        return period * (1.0 + self.random.uniform(-self.jitter, self.jitter))
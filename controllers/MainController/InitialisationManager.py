@@ -11,18 +11,16 @@ from RobotUp import *
 
 def init_devices(robot: RobotUp):
     """
-    Enable all devices of the robot with a simulation time_step of 10 (ms).
-    time_step value can be modified.
+    Apply the sampling profile of the robot (see sampling_profile in RobotUp) :
+    only the devices used by the controller are enabled, each one at its own period, at its first access.
+    The devices which aren't in the profile (unused sensors) stay disabled.
 
     Args:
         robot (RobotUp): The robot to initialize
     """
-    time_step = 10
+    robot.set_sampling_profile(robot.sampling_profile)
 
-    # Loop through each device and attempt to enable it if the enable method exists
-    for device_name in robot.robot.devices:
-        device = robot.robot.devices[device_name]
-        if hasattr(device, 'enable') and callable(getattr(device, 'enable')):
-            device.enable(time_step)
+    # The robot has no task yet
+    robot.set_sampling_profile(robot.idle_sampling_profile)
 
     print(robot.getName(), " has been enabled")
\ No newline at end of file
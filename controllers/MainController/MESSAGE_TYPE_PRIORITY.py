@@ -37,13 +37,16 @@ class MESSAGE_TYPE_PRIORITY(Enum):
     # Stop current task
     STOP = auto()
 
+    # Acknowledgement of the reliable messages (handled by the communication manager, never queued)
+    ACK = auto()
+
     @staticmethod
-    def priority(msg_type: str) -> int:
+    def priority(msg_type) -> int:
         """
         Get the priority associated with a given message type.
 
         Args:
-            msg_type (str): The message type for which to get the priority.
+            msg_type (str | MESSAGE_TYPE_PRIORITY): The message type (or its string) for which to get the priority.
 
         Returns:
             int: The priority associated with the given message type.
@@ -51,34 +54,61 @@ class MESSAGE_TYPE_PRIORITY(Enum):
         Raises:
             ValueError: If the message type is not found in the priority mapping.
         """
-        priority_mapping = {
-            MESSAGE_TYPE_PRIORITY.REPORT_STATUS: 1,
-            MESSAGE_TYPE_PRIORITY.REPORT_POSITION: 1,
-            MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL: 8,
-            MESSAGE_TYPE_PRIORITY.REPORT_END_ROLLCALL: 8,
+        try:
+            return _PRIORITY_MAPPING[MESSAGE_TYPE_PRIORITY.from_string(msg_type)]
+        except KeyError:
+            raise ValueError("Message type not found in priority mapping")
 
-            MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE: 8,
-            MESSAGE_TYPE_PRIORITY.STATUS_FREE: 8,
-            MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES: 9,
-            MESSAGE_TYPE_PRIORITY.STATUS_CURRENT_TASK: 6,
+    @staticmethod
+    def is_coalesced(msg_type) -> bool:
+        """
+        Check if only the latest message of a given type from a sender matters.
+        Such a message replaces the queued message of the same type from the same sender (see MessageQueue).
 
-            MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES: 6,
+        Args:
+            msg_type (str | MESSAGE_TYPE_PRIORITY): The message type (or its string).
 
-            MESSAGE_TYPE_PRIORITY.STOP: 10
-        }
+        Returns:
+            bool: True if the message type is coalesced.
+        """
+        return MESSAGE_TYPE_PRIORITY.from_string(msg_type) in _COALESCED_TYPES
 
-        try:
-            return priority_mapping[MESSAGE_TYPE_PRIORITY.from_string(msg_type)]
-        except KeyError:
-            raise ValueError("Message type not found in priority mapping")
+    @staticmethod
+    def is_reliable(msg_type) -> bool:
+        """
+        Check if the unicast messages of a given type have to be delivered reliably (acknowledged and sent again
+        if lost, see ReliableChannel). The other messages are sent once (best effort).
+
+        Args:
+            msg_type (str | MESSAGE_TYPE_PRIORITY): The message type (or its string).
+
+        Returns:
+            bool: True if the message type is reliable.
+        """
+        return MESSAGE_TYPE_PRIORITY.from_string(msg_type) in _RELIABLE_TYPES
 
     @staticmethod
-    def from_string(type_string: str):
+    def is_flooded(msg_type) -> bool:
+        """
+        Check if the messages of a given type are flooded (relayed by the robots which receive them).
+        Only their ids are remembered, to drop their copies and to relay them once (see CommunicationManager).
+
+        Args:
+            msg_type (str | MESSAGE_TYPE_PRIORITY): The message type (or its string).
+
+        Returns:
+            bool: True if the message type is flooded.
+        """
+        return MESSAGE_TYPE_PRIORITY.from_string(msg_type) in _FLOODED_TYPES
+
+    @staticmethod
+    def from_string(type_string):
         """
         Get MESSAGE_TYPE_PRIORITY enum object from string representation.
 
         Args:
-            type_string (str): The string representation of the message type.
+            type_string (str | MESSAGE_TYPE_PRIORITY): The string representation of the message type.
+                                                       An enum object is returned as it is.
 
         Returns:
             MESSAGE_TYPE_PRIORITY: The corresponding enum object.
@@ -86,8 +116,52 @@ class MESSAGE_TYPE_PRIORITY(Enum):
         Raises:
             ValueError: If the string representation does not match any enum member.
         """
+        if isinstance(type_string, MESSAGE_TYPE_PRIORITY):
+            return type_string
+
         enum_name = type_string.split('.')[-1]  # Split by '.', take the last part
         try:
             return MESSAGE_TYPE_PRIORITY[enum_name]
         except KeyError:
             raise ValueError("Invalid message type string")
+
+
+# Priority of each message type, built once (the higher, the more urgent)
+_PRIORITY_MAPPING = {
+    MESSAGE_TYPE_PRIORITY.REPORT_STATUS: 1,
+    MESSAGE_TYPE_PRIORITY.REPORT_POSITION: 1,
+    MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL: 8,
+    MESSAGE_TYPE_PRIORITY.REPORT_END_ROLLCALL: 8,
+
+    MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE: 8,
+    MESSAGE_TYPE_PRIORITY.STATUS_FREE: 8,
+    MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES: 9,
+    MESSAGE_TYPE_PRIORITY.STATUS_CURRENT_TASK: 6,
+
+    MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES: 6,
+
+    MESSAGE_TYPE_PRIORITY.STOP: 10,
+
+    MESSAGE_TYPE_PRIORITY.ACK: 10
+}
+
+# Message types for which only the latest message from a sender matters (its handler overwrites the previous value).
+# Only state messages : a roll call or a STATUS_FREE (hand-off coordinates) has to be processed each time, and a
+# position delta never replaces a queued keyframe (see MessageQueue)
+_COALESCED_TYPES = frozenset({
+    MESSAGE_TYPE_PRIORITY.STATUS_CURRENT_TASK,
+    MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES,
+    MESSAGE_TYPE_PRIORITY.REPORT_POSITION
+})
+
+# Message types whose unicast messages are delivered reliably (the task traffic, the telemetry stays best effort)
+_RELIABLE_TYPES = frozenset({
+    MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES,
+    MESSAGE_TYPE_PRIORITY.STATUS_FREE
+})
+
+# Message types relayed by the robots, the only ones which can be received several times (see is_flooded)
+_FLOODED_TYPES = frozenset({
+    MESSAGE_TYPE_PRIORITY.STOP,
+    MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL
+})
@@ -15,7 +15,6 @@ from RobotUp import *
 
 # The unique allowed creation of robot
 robot = RobotUp()
-time_step = robot.getBasicTimeStep()
 # Initialisation of robot devices
 init_devices(robot)
 
@@ -24,9 +23,13 @@ init_devices(robot)
 robot.getDevice("emitter").setRange(-1)
 
 network_manager = NetworkManager(robot)
+
+# Profiling of the ticks (phases, real-time factor, stack sampler), enabled by the environment variable ROBOT_PROFILE
+robot.profiler = Profiler.from_environment(robot.getName(), robot.getTime, robot.logger)
 # ------------------------
 
-# Main loop of simulation
+# Main loop of simulation : handle the messages, then the scheduler advances the tasks and does the step of the tick
 while True:
     network_manager.update()
-    robot.step(int(time_step))
+    if network_manager.scheduler.step() == -1:
+        break
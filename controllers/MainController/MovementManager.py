@@ -25,48 +25,67 @@ class MovementManager:
         """
         Initializes the left and right motors of the robot.
 
+        |!| The last commanded speeds are cached : there must be only one MovementManager per robot,
+        get it with robot.get_manager(MovementManager), otherwise the caches don't know the commands of the others.
+
         :param robot (RobotUp) : Robot to init
         """
         self.robot = robot
-        self.right_motors = [self.robot.getDevice(f"wheel_motor0{i}") for i in range(5)]
-        self.left_motors = [self.robot.getDevice(f"wheel_motor0{i+5}") for i in range(5)]
+        self.right_motors = [self.robot.getDevice(f"wheel_motor0{i}") for i in range(NUM_MOTORS)]
+        self.left_motors = [self.robot.getDevice(f"wheel_motor0{i+NUM_MOTORS}") for i in range(NUM_MOTORS)]
 
         for motor in self.left_motors + self.right_motors:
             motor.setPosition(float('inf'))
             motor.setVelocity(0.0)
 
+        # Last commanded speed of each side (positive = forward), the motors are only set when it changes
+        self.left_speed = 0.0
+        self.right_speed = 0.0
+
+    def set_wheel_speeds(self, left_speed: float, right_speed: float):
+        """
+        Set the speed of each side of the track (differential drive).
+        A positive speed moves the side forward, a negative speed moves it backward.
+        The speeds are limited to [-MAX_SPEED, MAX_SPEED] and the motors of a side are only set if its speed changes.
+
+        :param left_speed: Speed of the left side of the track.
+        :param right_speed: Speed of the right side of the track.
+        """
+        left_speed = max(-MAX_SPEED, min(MAX_SPEED, float(left_speed)))
+        right_speed = max(-MAX_SPEED, min(MAX_SPEED, float(right_speed)))
+
+        if left_speed != self.left_speed:
+            for left_motor in self.left_motors:
+                left_motor.setVelocity(-left_speed)
+            self.left_speed = left_speed
+
+        if right_speed != self.right_speed:
+            for right_motor in self.right_motors:
+                right_motor.setVelocity(-right_speed)
+            self.right_speed = right_speed
+
     def stop(self):
         """
         Stop the robot (set the motor's velocity to 0)
         """
-        for motor in self.left_motors + self.right_motors:
-            motor.setVelocity(0.0)
+        self.set_wheel_speeds(0.0, 0.0)
 
     def move_forward(self):
         """
         Move the robot forward (at Max_speed)
         """
-        for motor in self.left_motors + self.right_motors:
-            motor.setVelocity(-MAX_SPEED)
+        self.set_wheel_speeds(MAX_SPEED, MAX_SPEED)
 
     def move_left(self):
         """
-        Rotate the robot to the left by setting the velocity of left motors to MAX_SPEED
-        and the velocity of right motors to -MAX_SPEED.
+        Rotate the robot to the left by moving the left side of the track forward
+        and the right side backward, at MAX_SPEED.
         """
-        for left_motor in self.left_motors:
-            left_motor.setVelocity(-MAX_SPEED)
-
-        for right_motor in self.right_motors:
-            right_motor.setVelocity(MAX_SPEED)
+        self.set_wheel_speeds(MAX_SPEED, -MAX_SPEED)
 
     def move_right(self):
         """
-        Rotate the robot to the right by setting the velocity of left motors to MAX_SPEED
-        and the velocity of right motors to -MAX_SPEED.
+        Rotate the robot to the right by moving the left side of the track backward
+        and the right side forward, at MAX_SPEED.
         """
-        for left_motor in self.left_motors:
-            left_motor.setVelocity(MAX_SPEED)
-
-        for right_motor in self.right_motors:
-            right_motor.setVelocity(-MAX_SPEED)
+        self.set_wheel_speeds(-MAX_SPEED, MAX_SPEED)
@@ -8,8 +8,12 @@ Author:         Nordine HIDA
 Modifications:
 """
 
-from MovementManager import *
+import time
+from PositionManager import *
 from CommunicationManager import *
+from TaskScheduler import *
+from Heartbeat import *
+import Task_GoToCoordinates as GTC
 
 
 class NetworkManager:
@@ -31,14 +35,35 @@ class NetworkManager:
 
         # Communication manager
         self.communication = CommunicationManager(self.robot)
-        self.movement = MovementManager(self.robot)
-
-        # Timer at the end of which we call nearby neighbors.
-        self.timer_asking_neighbor = 0
+        # Position and movement managers, shared by all the users of the robot
+        self.position = self.robot.get_manager(PositionManager)
+        self.movement = self.robot.get_manager(MovementManager)
+
+        # Scheduler of the robot's tasks, it does the simulation step of each tick
+        self.scheduler = TaskScheduler(self.robot)
+        # Coordinates the robot is going to (None if it isn't moving)
+        self.current_target = None
+
+        # Timer at the end of which we call nearby neighbors, less often while nothing changes
+        self.heartbeat = Heartbeat(self.robot.heartbeat_min_period, self.robot.heartbeat_max_period,
+                                   self.robot.heartbeat_backoff, self.robot.heartbeat_jitter, self.robot_name)
+
+        # Budget of an update : maximum number of messages handled (CAN BE MODIFIED)
+        self.dispatch_max_messages = 10
+        # Budget of an update : maximum CPU time (in ms) spent handling messages (CAN BE MODIFIED)
+        self.dispatch_max_time = 5.0
+
+        # Statistics of the dispatch, to tune the budget
+        # number of messages still waiting after the last update, and the highest value seen
+        self.backlog = 0
+        self.max_backlog = 0
+        # number of handled messages, and number of updates that ended with their budget exhausted
+        self.dispatched_count = 0
+        self.budget_exhausted_count = 0
 
     def go_to_coordinates(self, x: float, y: float):
         """
-        If the robot is free, call the task to move the robot to coordinates
+        If the robot is free, start the task moving the robot to coordinates (run by the scheduler, one tick per update)
         else it adds those coordinates to its list of next coordinates
 
         When it reaches its goal, it sends a message to tell that it is free and where it stopped.
@@ -46,32 +71,48 @@ class NetworkManager:
             x (float): The x-coordinate.
             y (float): The y-coordinate.
         """
-        import Task_GoToCoordinates as GTC
-
         # if i'm free I move
         if self.robot.robot_current_task == MESSAGE_TYPE_PRIORITY.STATUS_FREE:
             self.robot.robot_current_task = str(MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES) + ":" + str(x) + ":" + str(y)
-            GTC.go_to_coordinates(self.robot, Coordinates(float(x), float(y)))
-
-            # Here the robot has reached its goal, or it has been stopped -> Status free.
-            self.robot.robot_current_task = MESSAGE_TYPE_PRIORITY.STATUS_FREE
-
-            # If it hasn't been stopped, it sends a message to the first free robot to tell where it should go.
-            if not self.robot.is_stopped:
-                self.update_prev_next_firstfree_robot()
-                recipient = "toto"
-                if self.robot.next_rob:
-                    recipient = self.robot.next_rob
-                # if self.robot.first_free_rob:
-                    # recipient = self.robot.first_free_rob
-                self.communication.send_message(Message(self.robot_name, MESSAGE_TYPE_PRIORITY.STATUS_FREE, 0,
-                                                        f"{MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES}:{x}:{y}",
-                                                        recipient))
+            # The sensors of the position are sampled at their active period while moving
+            self.robot.set_sampling_profile(self.robot.sampling_profile)
+
+            self.current_target = Coordinates(float(x), float(y))
+            task = GTC.go_to_coordinates(self.robot, self.current_target)
+            self.scheduler.spawn("GoToCoordinates", task,
+                                 MESSAGE_TYPE_PRIORITY.priority(MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES),
+                                 lambda: self.end_go_to_coordinates(x, y))
 
         # if I'm already moving, I add new Coordinates to move
         elif self.robot.robot_current_task == MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES:
             self.robot.next_coordinates.append(Coordinates(float(x), float(y)))
 
+    def end_go_to_coordinates(self, x: float, y: float):
+        """
+        Called when the task moving the robot to coordinates ends (goal reached, or cancelled by a STOP).
+        The robot is free again, and if it hasn't been stopped it tells where it stopped.
+
+        Args:
+            x (float): The x-coordinate.
+            y (float): The y-coordinate.
+        """
+        # Here the robot has reached its goal, or it has been stopped -> Status free.
+        self.robot.robot_current_task = MESSAGE_TYPE_PRIORITY.STATUS_FREE
+        self.robot.set_sampling_profile(self.robot.idle_sampling_profile)
+        self.current_target = None
+
+        # If it hasn't been stopped, it sends a message to the first free robot to tell where it should go.
+        if not self.robot.is_stopped:
+            self.update_prev_next_firstfree_robot()
+            recipient = "toto"
+            if self.robot.next_rob:
+                recipient = self.robot.next_rob
+            # if self.robot.first_free_rob:
+                # recipient = self.robot.first_free_rob
+            self.communication.send_message(Message(self.robot_name, MESSAGE_TYPE_PRIORITY.STATUS_FREE, 0,
+                                                    f"{MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES}:{x}:{y}",
+                                                    recipient))
+
     def case_REPORT_STATUS(self, id_sender: str):
         """
         Answer to the status' question by sending my current task.
@@ -89,14 +130,15 @@ class NetworkManager:
 
     def case_REPORT_POSITION(self, id_sender: str, payload: str):
         """
-        Handle the REPORT_POSITION message.
+        Remember the position reported by a robot.
 
         Args:
             id_sender (str): The ID of the sender.
-            payload (str): The payload of the message.
+            payload (str): The payload of the message (see PositionReport).
         """
-        # TODO: Handle the REPORT_POSITION message
-        pass
+        position = self.robot.fleet_positions.update(id_sender, payload, self.robot.getTime())
+        if position is not None:
+            self.robot.neighbor_index.update(id_sender, position.x, position.y)
 
     def case_STATUS_GOTOCOORDINATES(self, id_sender: str, payload: str):
         """
@@ -149,18 +191,21 @@ class NetworkManager:
 
         return context_value
 
-    def case_STOP(self, send_counter: int):
+    def case_STOP(self, send_counter: int, origin: str = None, sequence: int = None):
         """
         Stop the robot movement and reset it.
         Clear all messages, coordinates, known_robot in the robot's memory
         Args:
             send_counter (int): The number of time that this roll call as been sent.
+            origin (str): Origin of the received STOP (None if the STOP starts here).
+            sequence (int): Sequence number of the received STOP at its origin.
         """
         self.movement.stop()
 
-        # if I'm not already stopped, I send a stop message
+        # if I'm not already stopped, I relay the stop message (once per STOP)
         if not self.robot.is_stopped:
-            self.communication.send_message(Message(self.robot_name, MESSAGE_TYPE_PRIORITY.STOP, send_counter, "STOP"))
+            self.communication.relay(Message(self.robot_name, MESSAGE_TYPE_PRIORITY.STOP, send_counter, "STOP", "",
+                                             origin, sequence))
 
         self.robot.reset()
         self.robot.is_stopped = True
@@ -181,30 +226,35 @@ class NetworkManager:
         else:
             self.robot.next_coordinates.append(Coordinates(float(x), float(y)))
 
-    def case_REPORT_BEGIN_ROLLCALL(self, id_sender: str, payload: str, send_counter: int):
+    def case_REPORT_BEGIN_ROLLCALL(self, id_sender: str, payload: str, send_counter: int,
+                                   origin: str = None, sequence: int = None):
         """
         Add the sender to It's known list of robot and send the message if the counter hasn't reached the max.
+        The roll call is relayed only once (the first time it is received).
         |!| I RESET MY KNOWN ROBOT IF THE COUNTER = 0 (first iteration of the message)
 
         Args:
             id_sender (str): The ID of the sender.
             payload (str): The payload of the message.
             send_counter (int): The number of time that this roll call as been sent.
+            origin (str): Origin of the roll call.
+            sequence (int): Sequence number of the roll call at its origin.
         """
 
         # unstopped the robot
         self.robot.is_stopped = False
 
-        message_rollcall = Message(self.robot_name, MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL, send_counter, str(self.robot.robot_current_task))
+        message_rollcall = Message(self.robot_name, MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL, send_counter, str(self.robot.robot_current_task),
+                                   "", origin, sequence)
 
         # I add the sender if It's a robot and if I'm initialized (= my list of all robots has been filled)
         if self.robot.is_initialized:
             if id_sender != "Remote" and id_sender != "Initializer":
                 self.robot.known_robots[id_sender] = payload
 
-        # if the counter hasn't reached the max, I send the message
+        # if the counter hasn't reached the max, I relay the message (if not already done)
         if send_counter < self.robot.max_counter:
-            self.communication.send_message(message_rollcall)
+            self.communication.relay(message_rollcall)
 
     def case_STATUS_OUT_RANGE(self, payload: str):
         """
@@ -216,94 +266,176 @@ class NetworkManager:
         all_known_robots = payload.split(":")
         self.robot.reset()
         self.communication.clear_messages()
-        self.robot.known_robots = {name: MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE for name in all_known_robots}
-        self.robot.neighbors_last_com = {name: 0 for name in all_known_robots}
+        self.robot.known_robots = FleetIndex({name: MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE for name in all_known_robots})
+        self.robot.neighbors.reset(all_known_robots, self.robot.getTime())
         self.robot.getDevice("emitter").setRange(self.robot.range_emitter)
+        self.heartbeat.reset(self.robot.getTime())
 
         self.robot.is_initialized = True
 
     def update(self) -> int:
         """
-        Handle the received message.
+        Handle the received messages, by priority order, within the budget of the update
+        (dispatch_max_messages messages and dispatch_max_time ms of CPU).
+        The remaining messages wait for the next update.
 
         Returns:
-            int : case that was executed (-1 if no messages was handled)
+            int : case that was executed (-1 if no messages was handled).
+                  STOP.value if one of the handled messages asked to stop the current task.
         """
         case_executed = -1
-        neighbors_updated = False
+        senders = set()
 
-        # try to receive a message and add it to the robot's list
+        # try to receive messages and add them to the robot's queue
         self.communication.receive_message()
+        profiler = self.robot.profiler
+        if profiler is not None:
+            profiler.lap("radio")
+
+        # Handle the messages while there are some and the budget isn't exhausted
+        deadline = time.process_time() + self.dispatch_max_time / 1000
+        handled = 0
+        metrics = self.robot.metrics
+        while self.robot.list_messages:
+            if handled >= self.dispatch_max_messages or time.process_time() > deadline:
+                self.budget_exhausted_count += 1
+                if metrics is not None:
+                    metrics.count("budget_exhausted")
+                break
 
-        # Check if the list of messages is not empty
-        if self.robot.list_messages:
+            # Getting the most prioritary message and remove it from the queue
+            message = self.robot.list_messages.pop()
+            if metrics is not None:
+                self.observe_dispatch(metrics, message)
+            case = self.dispatch(message)
+            handled += 1
 
-            # Getting the first message and remove it from the list
-            message = self.robot.list_messages[0]
-            self.robot.list_messages.pop(0)
+            if self.robot.is_initialized:
+                senders.add(message.id_sender)
 
-            id_sender = message.id_sender
-            message_type = MESSAGE_TYPE_PRIORITY.from_string(message.message_type)
-            send_counter = message.send_counter
-            payload = message.payload
+            if case_executed == -1 or case == MESSAGE_TYPE_PRIORITY.STOP.value:
+                case_executed = case
 
-            case_executed = message_type.value
+            # The current task has to stop, the other messages wait for the next update
+            if case == MESSAGE_TYPE_PRIORITY.STOP.value:
+                self.scheduler.cancel_all()
+                break
 
-            match message_type:
-                case MESSAGE_TYPE_PRIORITY.REPORT_STATUS:
-                    self.case_REPORT_STATUS(id_sender)
+        self.dispatched_count += handled
+        self.backlog = len(self.robot.list_messages)
+        self.max_backlog = max(self.max_backlog, self.backlog)
+        if metrics is not None:
+            metrics.gauge("message_backlog", self.backlog)
+        if profiler is not None:
+            profiler.lap("dispatch")
+
+        # Reorder the next coordinates if new ones arrived (within the planning budget of the tick)
+        if self.robot.optimize_waypoints and self.robot.next_coordinates.needs_planning():
+            start = self.current_target if self.current_target is not None else self.position.get_position()
+            plan_waypoints(self.robot.next_coordinates, start, self.robot.waypoint_planning_budget)
+            if profiler is not None:
+                profiler.lap("planning")
 
-                case MESSAGE_TYPE_PRIORITY.STATUS_CURRENT_TASK:
-                    self.case_STATUS_CURRENT_TASK(id_sender, payload)
+        if self.robot.next_coordinates and self.robot.robot_current_task == MESSAGE_TYPE_PRIORITY.STATUS_FREE:
+            next_coordinates = self.robot.next_coordinates.popleft()
+            self.go_to_coordinates(next_coordinates.x, next_coordinates.y)
 
-                case MESSAGE_TYPE_PRIORITY.REPORT_POSITION:
-                    self.case_REPORT_POSITION(id_sender, payload)
+        if self.robot.is_initialized:
+            self.update_neighbors_last_com(senders)
 
-                case MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES:
-                    self.case_STATUS_GOTOCOORDINATES(id_sender, payload)
+            self.update_prev_next_firstfree_robot()
+            if profiler is not None:
+                profiler.lap("neighbors")
 
-                case MESSAGE_TYPE_PRIORITY.STATUS_FREE:
-                    case_executed = self.case_STATUS_FREE(id_sender, payload)
+            self.report_position()
 
-                case MESSAGE_TYPE_PRIORITY.STOP:
-                    self.case_STOP(send_counter)
+            # A change of the fleet (robots in/out of range, statuses) or of my task brings the timer back to its
+            # shortest period
+            now = self.robot.getTime()
+            self.heartbeat.observe((self.robot.known_robots.version, str(self.robot.robot_current_task)), now)
 
-                case MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES:
-                    self.case_GO_TO_COORDINATES(id_sender, payload)
+            # If the timer is over, we refresh our neighborhood by asking who's nearby
+            if self.heartbeat.is_due(now):
+                # Ask who is nearby and send it own current task
+                self.communication.send_message_all(self.robot_name, MESSAGE_TYPE_PRIORITY.REPORT_STATUS, 0, self.robot.robot_current_task)
 
-                case MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL:
-                    self.case_REPORT_BEGIN_ROLLCALL(id_sender, payload, send_counter)
+        if profiler is not None:
+            profiler.lap("network")
+        return case_executed
 
-                case MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE:
-                    self.case_STATUS_OUT_RANGE(payload)
+    def report_position(self):
+        """
+        Send my position to the robots nearby (REPORT_POSITION) if a report is due (see PositionReporter).
+        """
+        if not self.robot.report_position:
+            return
 
-                case _:
-                    print("Unknown message received")
-                    pass
+        pose = self.position.get_position()
+        payload = self.robot.position_reporter.report(pose.x, pose.y, pose.heading, self.robot.getTime())
+        if payload:
+            self.communication.send_message_all(self.robot_name, MESSAGE_TYPE_PRIORITY.REPORT_POSITION, 0, payload)
 
-            if self.robot.is_initialized:
-                self.update_neighbors_last_com(id_sender)
-                neighbors_updated = True
+    def observe_dispatch(self, metrics: Metrics, message: Message):
+        """
+        Count a dispatched message and its waiting time in the queue (since its reception, in simulation time).
 
-        if self.robot.next_coordinates and self.robot.robot_current_task == MESSAGE_TYPE_PRIORITY.STATUS_FREE:
-            x = self.robot.next_coordinates[0].x
-            y = self.robot.next_coordinates[0].y
-            self.robot.next_coordinates.pop(0)
-            self.go_to_coordinates(x, y)
+        Args:
+            metrics (Metrics): The metrics of the robot.
+            message (Message): The message taken from the queue.
+        """
+        message_type = message.message_type.name
+        metrics.count("dispatched." + message_type)
+        if message.received_time is not None:
+            metrics.observe("latency." + message_type, self.robot.getTime() - message.received_time)
 
-        if self.robot.is_initialized:
-            if not neighbors_updated:
-                self.update_neighbors_last_com()
+    def dispatch(self, message: Message) -> int:
+        """
+        Handle a message according to its type.
 
-            self.update_prev_next_firstfree_robot()
+        Args:
+            message (Message): The message to handle.
 
-            # If the timer is over, we refresh our neighborhood by asking who's nearby
-            if self.timer_asking_neighbor > 50:
-                # Ask who is nearby and send it own current task
-                self.communication.send_message_all(self.robot_name, MESSAGE_TYPE_PRIORITY.REPORT_STATUS, 0, self.robot.robot_current_task)
-                self.timer_asking_neighbor = 0
-            else:
-                self.timer_asking_neighbor += 1
+        Returns:
+            int : case that was executed
+        """
+        id_sender = message.id_sender
+        message_type = MESSAGE_TYPE_PRIORITY.from_string(message.message_type)
+        send_counter = message.send_counter
+        payload = message.payload
+
+        case_executed = message_type.value
+
+        match message_type:
+            case MESSAGE_TYPE_PRIORITY.REPORT_STATUS:
+                self.case_REPORT_STATUS(id_sender)
+
+            case MESSAGE_TYPE_PRIORITY.STATUS_CURRENT_TASK:
+                self.case_STATUS_CURRENT_TASK(id_sender, payload)
+
+            case MESSAGE_TYPE_PRIORITY.REPORT_POSITION:
+                self.case_REPORT_POSITION(id_sender, payload)
+
+            case MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES:
+                self.case_STATUS_GOTOCOORDINATES(id_sender, payload)
+
+            case MESSAGE_TYPE_PRIORITY.STATUS_FREE:
+                case_executed = self.case_STATUS_FREE(id_sender, payload)
+
+            case MESSAGE_TYPE_PRIORITY.STOP:
+                self.case_STOP(send_counter, message.origin, message.sequence)
+
+            case MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES:
+                self.case_GO_TO_COORDINATES(id_sender, payload)
+
+            case MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL:
+                self.case_REPORT_BEGIN_ROLLCALL(id_sender, payload, send_counter, message.origin, message.sequence)
+
+            case MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE:
+                self.case_STATUS_OUT_RANGE(payload)
+
+            case _:
+                self.robot.logger.warning("network", "Unknown message received : %s", message)
+                pass
 
         return case_executed
 
@@ -312,62 +444,32 @@ class NetworkManager:
         Update the previous, next and the first free robots based on the robot's name and known_robots dictionary.
         |!| It ignores OUT_RANGE robots !
 
-        This method looks into the known_robots dictionary to find the key (robot name) just before and just after
-        the current robot's name (self.robot_name). It then updates the prev_rob and next_rob attributes accordingly.
-
-        Then it iterates through the dictionary to find the first available robot (or leaves it as None if no robots are free).
+        known_robots is a FleetIndex kept up to date on each status change : it gives the robot just before and
+        just after the current robot's name (self.robot_name) in alphabetical order, and the first free robot
+        (or None if no robots are free), in O(log n).
         """
-        sorted_robots = sorted(self.robot.known_robots.keys())
-        current_index = sorted_robots.index(self.robot_name)
-
-        # Find previous robot ignoring STATUS_OUT_RANGE robots
-        prev_index = current_index - 1
-        while prev_index >= 0:
-            if self.robot.known_robots[sorted_robots[prev_index]] != MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE:
-                self.robot.prev_rob = sorted_robots[prev_index]
-                break
-            prev_index -= 1
-        else:
-            self.robot.prev_rob = None
-
-        # Find next robot ignoring STATUS_OUT_RANGE robots
-        next_index = current_index + 1
-        while next_index < len(sorted_robots):
-            if self.robot.known_robots[sorted_robots[next_index]] != MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE:
-                self.robot.next_rob = sorted_robots[next_index]
-                break
-            next_index += 1
-        else:
-            self.robot.next_rob = None
+        self.robot.prev_rob = self.robot.known_robots.previous_in_range(self.robot_name)
+        self.robot.next_rob = self.robot.known_robots.next_in_range(self.robot_name)
+        self.robot.first_free_rob = self.robot.known_robots.first_free()
 
-        self.robot.first_free_rob = None
-        sorted_known_robots = dict(sorted(self.robot.known_robots.items()))
-        # Iterate through the sorted robots to get the first free robot
-        i = 0
-        while i < len(sorted_known_robots) and self.robot.first_free_rob is None:
-            key = sorted_robots[i]
-            # Check if the value of the key is "STATUS_FREE"
-            if sorted_known_robots[key] == str(MESSAGE_TYPE_PRIORITY.STATUS_FREE):
-                # Update first_rob with the robot's name
-                self.robot.first_free_rob = key
-            i += 1
-
-    def update_neighbors_last_com(self, id_sender: str = None):
+    def update_neighbors_last_com(self, id_senders: set = frozenset()):
         """
-        Update the last communication time for neighboring robots.
+        Update the last communication time for neighboring robots,
+        and mark as OUT OF RANGE the ones that haven't communicated for neighbor_expiry seconds.
+        Only the robots whose deadline has passed are looked at. Only the known robots are neighbors
+        (not the remote nor the initializer).
 
         Args:
-            id_sender (str): The ID of the sender robot.
-        """
-        # Reset the last communication time for the sender robot
-        if id_sender:
-            self.robot.neighbors_last_com[id_sender] = 0
-
-        # Increment the last communication time for all neighbors
-        # and mark the robot as OUT OF RANGE if it hasn't communicated for 400 times (400 update loop)
-        for neighbor_id, last_com_time in self.robot.neighbors_last_com.items():
-            if id_sender is None or id_sender != neighbor_id:
-                self.robot.neighbors_last_com[neighbor_id] += 1
-                if last_com_time > 400:
-                    self.robot.known_robots[neighbor_id] = MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE
+            id_senders (set): The IDs of the robots that sent the messages handled during this update.
+        """
+        now = self.robot.getTime()
+
+        known_robots = self.robot.known_robots
+        if known_robots is not None:
+            for id_sender in id_senders:
+                if id_sender in known_robots:
+                    self.robot.neighbors.touch(id_sender, now)
+
+        for neighbor_id in self.robot.neighbors.expire(now):
+            self.robot.known_robots[neighbor_id] = MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE
 
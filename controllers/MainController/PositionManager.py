@@ -1,7 +1,7 @@
 """
 File:          PositioningManager.py
 Date:          February 2024
-Description:   Manage the position and orientation of the track robot. It allows you to rotate to coordinates.
+Description:   Manage the position and orientation of the track robot. It allows you to steer toward coordinates.
 Author:        Nordine HIDA
 Modifications:
 """
@@ -9,6 +9,18 @@ Modifications:
 import math
 from MovementManager import *
 from Coordinates import *
+from HeadingController import *
+from SensorSnapshot import *
+
+# CONSTANTS
+# Gains of the heading controller (error in degrees, output in speed of the track) (CAN BE MODIFIED)
+HEADING_KP = 0.3
+HEADING_KI = 0.05
+HEADING_KD = 0.01
+
+# Distance (in meters) to the destination under which the robot slows down, and its minimum speed ratio
+SLOWDOWN_DISTANCE = 0.5
+MIN_APPROACH_RATIO = 0.2
 
 
 class PositionManager:
@@ -26,10 +38,11 @@ class PositionManager:
         :param robot (RobotUp) : The robot instance.
         """
         self.robot = robot
-        self.compass = robot.getDevice("compass")
-        self.gps = robot.getDevice("gps")
+        # gps and compass, read once per step
+        self.sensors = self.robot.get_manager(SensorSnapshot)
         self.time_step = int(self.robot.getBasicTimeStep())
-        self.movement_manager = MovementManager(self.robot)
+        self.movement_manager = self.robot.get_manager(MovementManager)
+        self.heading_controller = HeadingController(HEADING_KP, HEADING_KI, HEADING_KD, MAX_SPEED)
 
     def get_movement_manager(self):
         """
@@ -60,47 +73,104 @@ class PositionManager:
 
         :return: The heading angle in degrees.
         """
-        compass_values = self.compass.getValues()
-
-        rad = math.atan2(compass_values[0], compass_values[1])
-        heading_angle_degrees = math.degrees(rad)
-
-        if heading_angle_degrees < 0.0:
-            heading_angle_degrees += 360.0
-
-        return heading_angle_degrees
+        return self.sensors.get_pose().heading
 
-    def rotate_to_destination(self, angle_to_destination, tolerance):
+    def get_angle_difference(self, angle_to_destination):
         """
-        Rotate the robot until it reaches the specified angle.
+        Get the angle between the heading of the robot and a destination angle.
         :param angle_to_destination: The angle to the destination coordinates in degrees.
-        :param tolerance: The tolerance to consider the destination reached.
+        :return: The angle difference in degrees, in [-180, 180[ (positive if the robot has to turn left).
         """
-        heading_robot_angle = self.get_heading_robot()
-        angle_difference = angle_to_destination - heading_robot_angle
+        angle_difference = angle_to_destination - self.get_heading_robot()
         if angle_difference < -180.0:
             angle_difference += 360.0
         elif angle_difference >= 180.0:
             angle_difference -= 360.0
-        if not abs(angle_difference) < tolerance:
-            if angle_difference < 0:
-                self.movement_manager.move_right()
-            else:
-                self.movement_manager.move_left()
-            self.robot.step(self.time_step)
-            self.rotate_to_destination(angle_to_destination, tolerance)
-        else:
-            self.movement_manager.move_forward()
-            self.robot.step(self.time_step)
+        return angle_difference
+
+    def steer_towards(self, target_position):
+        """
+        Do one control update (one tick) driving the robot toward a coordinate.
+        The heading controller gives the speed difference between the sides of the track, and the robot moves
+        forward at the same time : the bigger the angle to the destination, the slower it moves forward
+        (it turns on itself when the destination is behind it). It also slows down near the destination.
+        The robots nearby push the robot away (see get_repulsion), their push is added to the direction
+        of the destination.
+        The GPS can read NaN (just after its sampling period changed) : the wheels are then left as they are
+        for this tick.
+        :param target_position: The target coordinates.
+        :return: The angle difference in degrees between the heading of the robot and the steered direction,
+                 None if the position isn't known in this tick.
+        """
+        robot_position = self.get_position()
+        if math.isnan(robot_position.x) or math.isnan(robot_position.y):
+            return None
+        distance = math.hypot(target_position.x - robot_position.x, target_position.y - robot_position.y)
+
+        # Direction of the destination (unit vector) + repulsion of the robots nearby
+        direction_x, direction_y = self.get_repulsion(robot_position)
+        if distance > 0.0:
+            direction_x += (target_position.x - robot_position.x) / distance
+            direction_y += (target_position.y - robot_position.y) / distance
+        bearing = math.degrees(math.atan2(direction_y, direction_x)) % 360.0
+
+        angle_difference = self.get_angle_difference(bearing)
+        turn = self.heading_controller.update(angle_difference, self.time_step / 1000)
+
+        forward = MAX_SPEED * max(0.0, math.cos(math.radians(angle_difference)))
+        if distance < SLOWDOWN_DISTANCE:
+            forward *= max(MIN_APPROACH_RATIO, distance / SLOWDOWN_DISTANCE)
+
+        left_speed = forward + turn
+        right_speed = forward - turn
+
+        # Keep the ratio between the sides if a side goes over the maximum speed
+        highest_speed = max(abs(left_speed), abs(right_speed))
+        if highest_speed > MAX_SPEED:
+            left_speed *= MAX_SPEED / highest_speed
+            right_speed *= MAX_SPEED / highest_speed
+
+        self.movement_manager.set_wheel_speeds(left_speed, right_speed)
+        return angle_difference
+
+    def get_repulsion(self, robot_position):
+        """
+        Get the push of the robots nearby (potential field), from their reported positions.
+        Each robot closer than avoidance_radius pushes away, from 0 at avoidance_radius to avoidance_gain when touching
+        (the attraction of the destination is 1). The robots nearby are found with the spatial index of the
+        reported positions, so the cost depends on the number of robots around, not on the size of the fleet.
+        :param robot_position: The position of the robot.
+        :return: The (x, y) repulsion vector.
+        """
+        radius = self.robot.avoidance_radius
+        if radius <= 0.0:
+            return 0.0, 0.0
+
+        now = self.robot.getTime()
+        name = self.robot.getName()
+        positions = self.robot.fleet_positions
+
+        def is_fresh(neighbor):
+            return neighbor != name and now - positions.get(neighbor).time <= self.robot.neighbor_position_max_age
+
+        repulsion_x = 0.0
+        repulsion_y = 0.0
+        for distance, neighbor in self.robot.neighbor_index.within(robot_position.x, robot_position.y, radius, is_fresh):
+            if distance <= 0.0:
+                continue
+            position = positions.get(neighbor)
+            weight = self.robot.avoidance_gain * (radius - distance) / radius / distance
+            repulsion_x += (robot_position.x - position.x) * weight
+            repulsion_y += (robot_position.y - position.y) * weight
+        return repulsion_x, repulsion_y
 
     def get_position(self):
         """
         Get the position of the robot.
 
-        :return: Coordinates of the robot.
+        :return: Coordinates of the robot (the read-only pose of the current step, with x and y).
         """
-        position = self.gps.getValues()
-        return Coordinates(position[0], position[1])
+        return self.sensors.get_pose()
 
     def is_arrived(self, target: Coordinates, tolerance: float):
         """
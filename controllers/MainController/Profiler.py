@@ -0,0 +1,213 @@
+"""
+File:           Profiler.py
+Date:           October 2026
+Description:    Profiling of the ticks of a controller : where the wall-clock time of each simulation step goes.
+                The tick is cut in phases (radio, dispatch, motion, step ...) : the code calls lap(phase) at the end
+                of each phase, and the time since the previous lap is given to it. A report of the share of each
+                phase, of the tick duration and of the real-time factor is logged periodically.
+                A stack sampler can also record the stack of the controller every few milliseconds, written at
+                the end in the collapsed format of the flamegraphs ("file:function;file:function count" lines).
+
+                It is enabled without code edits by environment variables :
+                    ROBOT_PROFILE           "phases" (or "1") : timing of the phases
+                                            "sample" : timing of the phases and stack sampler
+                                            unset, "" or "0" : disabled (the controller holds None)
+                    ROBOT_PROFILE_PERIOD    Time (in seconds of simulation) between two reports (10 by default)
+                    ROBOT_PROFILE_INTERVAL  Time (in ms) between two samples of the stack (5 by default)
+                    ROBOT_PROFILE_DIR       Directory of the collapsed stacks file (current directory by default)
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+
+
+class Profiler:
+    """
+    Timing of the phases of the ticks, real-time factor, and optional stack sampler.
+    """
+
+    def __init__(self, name: str, clock, logger, report_period: float = 10.0, sampling_interval: float = None,
+                 output_dir: str = "."):
+        """
+        Initialize the profiler, the first tick starts now.
+
+        Args:
+            name (str): Name of the controller.
+            clock (callable): Function returning the current simulation time in seconds.
+            logger (Logger): Logger of the controller, where the reports are written (category "profile").
+            report_period (float): Time (in seconds of simulation) between two reports.
+            sampling_interval (float): Time (in ms) between two samples of the stack, None for no sampler.
+            output_dir (str): Directory of the collapsed stacks file.
+        """
+        self.name = name
+        self.clock = clock
+        self.logger = logger
+        self.report_period = report_period
+
+        # phase -> wall-clock time (in seconds) spent in the phase during the report period
+        self.phase_times = {}
+        self.ticks = 0
+        self.max_tick = 0.0
+
+        now = time.perf_counter()
+        # End of the last lap and start of the current tick
+        self.last_lap = now
+        self.tick_start = now
+        # Start of the report period, in wall-clock and simulation time
+        self.period_start = now
+        self.period_sim_start = clock()
+
+        self.sampler = None
+        if sampling_interval:
+            self.sampler = StackSampler(sampling_interval, os.path.join(output_dir, "profile_" + name + ".folded"))
+            self.sampler.start()
+
+        atexit.register(self.close)
+
+    @staticmethod
+    def from_environment(name: str, clock, logger):
+        """
+        Create the profiler asked by the environment variables (see the description of the file).
+
+        Args:
+            name (str): Name of the controller.
+            clock (callable): Function returning the current simulation time in seconds.
+            logger (Logger): Logger of the controller.
+
+        Returns:
+            Profiler: The profiler, None if the profiling is disabled.
+        """
+        mode = os.environ.get("ROBOT_PROFILE", "").strip().lower()
+        if mode in ("", "0"):
+            return None
+        if mode not in ("1", "phases", "sample"):
+            logger.warning("profile", "Unknown ROBOT_PROFILE mode '%s', profiling disabled", mode)
+            return None
+
+        sampling_interval = None
+        if mode == "sample":
+            sampling_interval = float(os.environ.get("ROBOT_PROFILE_INTERVAL", 5.0))
+        return Profiler(name, clock, logger, float(os.environ.get("ROBOT_PROFILE_PERIOD", 10.0)),
+                        sampling_interval, os.environ.get("ROBOT_PROFILE_DIR", "."))
+
+    def lap(self, phase: str):
+        """
+        End a phase of the tick : the time since the previous lap is given to it.
+
+        Args:
+            phase (str): Name of the phase.
+        """
+        now = time.perf_counter()
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + now - self.last_lap
+        self.last_lap = now
+
+    def end_tick(self, phase: str = "step"):
+        """
+        End the last phase of the tick (the simulation step by default) and the tick.
+        The report is logged when the report period is over.
+
+        Args:
+            phase (str): Name of the last phase.
+        """
+        self.lap(phase)
+        self.ticks += 1
+        self.max_tick = max(self.max_tick, self.last_lap - self.tick_start)
+        self.tick_start = self.last_lap
+
+        if self.clock() - self.period_sim_start >= self.report_period:
+            self.report()
+
+    def report(self):
+        """
+        Log the report of the period (ticks, tick duration, real-time factor, share of each phase)
+        and start a new period.
+        """
+        now = time.perf_counter()
+        wall_time = now - self.period_start
+        sim_time = self.clock() - self.period_sim_start
+        if self.ticks and wall_time > 0:
+            total = sum(self.phase_times.values()) or 1.0
+            phases = " ".join("{} {:.1f}%".format(phase, 100 * spent / total)
+                              for phase, spent in sorted(self.phase_times.items(), key=lambda item: -item[1]))
+            self.logger.info("profile", "%d ticks, tick %.2f ms (max %.2f ms), real-time factor %.2f | %s",
+                             self.ticks, 1000 * wall_time / self.ticks, 1000 * self.max_tick, sim_time / wall_time,
+                             phases)
+
+        self.phase_times.clear()
+        self.ticks = 0
+        self.max_tick = 0.0
+        self.period_start = now
+        self.period_sim_start = self.clock()
+
+    def close(self):
+        """
+        Log the report of the last period and write the collapsed stacks of the sampler.
+        """
+        if self.ticks:
+            self.report()
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+
+
+class StackSampler:
+    """
+    Background thread recording the stack of the main thread at a regular interval.
+    The stacks are counted in the collapsed format of the flamegraphs.
+    """
+
+    def __init__(self, interval: float, file_path: str):
+        """
+        Initialize the sampler (not started).
+
+        Args:
+            interval (float): Time (in ms) between two samples.
+            file_path (str): Path of the collapsed stacks file, written when the sampler stops.
+        """
+        self.interval = interval / 1000
+        self.file_path = file_path
+        self.thread_id = threading.main_thread().ident
+
+        # collapsed stack -> number of samples
+        self.stacks = {}
+
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """
+        Start sampling.
+        """
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop sampling and write the collapsed stacks file.
+        """
+        self.stop_event.set()
+        self.thread.join(timeout=1.0)
+
+        with open(self.file_path, "w", encoding="utf-8") as stacks_file:
+            for stack, count in sorted(self.stacks.items()):
+                stacks_file.write("{} {}\n".format(stack, count))
+
+    def _run(self):
+        """
+        Sample the stack of the main thread until stopped.
+        """
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append("{}:{}".format(os.path.basename(code.co_filename), code.co_name))
+                frame = frame.f_back
+
+            if frames:
+                stack = ";".join(reversed(frames))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
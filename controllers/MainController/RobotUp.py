@@ -6,9 +6,19 @@ Author:         Nordine HIDA
 Modifications:
 """
 
+import math
 from controller.robot import *
-from Message import *
+from MessageQueue import *
+from Outbox import *
+from Logger import *
+from Metrics import *
+from Profiler import *
+from NeighborTable import *
+from FleetIndex import *
 from Coordinates import *
+from WaypointPlanner import *
+from PositionReport import *
+from SpatialIndex import *
 from typing import List
 
 
@@ -22,7 +32,75 @@ class RobotUp:
         Constructor for RobotUp class. Init all attributes
         """
         self.robot = Robot()
-        self.list_messages: List[Message] = []
+
+        # Logging : minimum level of the kept records (ring buffer of the ring_size last records), of the records
+        # printed on the console and of the records written in log_file (None for no file) (CAN BE MODIFIED)
+        # Levels : DEBUG (each message sent and received), INFO, WARNING, ERROR, OFF
+        self.log_level = DEBUG
+        self.console_log_level = INFO
+        self.log_file = None
+        self.log_ring_size = 1000
+        self.logger = Logger(self.getName(), self.getTime, self.log_level, self.console_log_level, self.log_file,
+                             DEBUG, self.log_ring_size)
+        # The last records are printed if the controller crashes
+        self.logger.install_crash_dump()
+
+        # Metrics of the message pipeline (counters, backlogs, latencies), appended every metrics_period seconds
+        # of simulation as JSON lines to metrics_file, for example "metrics_" + name + ".jsonl" (CAN BE MODIFIED)
+        # None disables them
+        self.metrics_file = None
+        self.metrics_period = 10.0
+        self.metrics = None
+        if self.metrics_file:
+            self.metrics = Metrics(self.getName(), self.getTime, self.metrics_file, self.metrics_period)
+
+        # Profiler of the ticks, set by the main program from the environment variables (see Profiler.py)
+        # None when the profiling is disabled
+        self.profiler = None
+
+        # Devices already resolved, by name (filled by getDevice)
+        self.devices = {}
+
+        # Sampling period (in ms) of the devices used by this controller (CAN BE MODIFIED)
+        # It is rounded up to a multiple of the basic time step (0 samples at each step), None disables the device.
+        # The devices which aren't listed are never enabled.
+        self.sampling_profile = {"gps": 0, "compass": 0, "receiver": 0}
+        # Sampling period (in ms) of the devices while the robot has no task, the position isn't needed often (CAN BE MODIFIED)
+        self.idle_sampling_profile = {"gps": 1000, "compass": 1000}
+        # Current sampling period of the devices (applied when a device is resolved, see set_sampling_profile)
+        self.sampling_periods = {}
+        # Managers of the robot (movement, position), one per class (filled by get_manager)
+        self.managers = {}
+
+        # Waiting time (in seconds) after which a queued message gains one level of priority (CAN BE MODIFIED)
+        # None disables the aging
+        self.message_aging_period = 1.0
+        # True to keep only the latest queued message from a sender for the message types where only the latest
+        # matters : the state messages STATUS_CURRENT_TASK, STATUS_GOTOCOORDINATES and REPORT_POSITION
+        # (see MESSAGE_TYPE_PRIORITY.is_coalesced) (CAN BE MODIFIED)
+        self.coalesce_messages = True
+        # Messages to process, ordered by priority
+        self.list_messages = MessageQueue(self.message_aging_period, self.getTime, self.coalesce_messages)
+
+        # Wire format of the sent messages, "binary" or "text" (CAN BE MODIFIED)
+        # Both formats are understood on reception, so controllers using different formats can talk together
+        self.wire_format = "binary"
+
+        # Maximum number of packets emitted per simulation step, the others wait for the next step (CAN BE MODIFIED)
+        # None is unlimited
+        self.packets_per_tick = 20
+        # Packets sent during the tick, emitted together at the next step
+        self.outbox = Outbox(self.getDevice("emitter"), self.packets_per_tick)
+
+        # Reliable delivery of the unicast messages of the task traffic (GO_TO_COORDINATES, STATUS_FREE, see
+        # MESSAGE_TYPE_PRIORITY.is_reliable) : acknowledged by the recipient and sent again if lost (CAN BE MODIFIED)
+        # The window is the number of messages per recipient waiting for their acknowledgement (the next ones wait),
+        # the timeout (in seconds of simulation) is used until the round-trip time is measured, and the recipient is
+        # considered unreachable after max_retries retransmissions of a message (its messages are dropped).
+        self.reliable_unicast = True
+        self.reliable_window = 8
+        self.reliable_initial_timeout = 0.5
+        self.reliable_max_retries = 8
 
         # Range of the emitter (CAN BE MODIFIED)
         self.range_emitter = 5
@@ -35,11 +113,47 @@ class RobotUp:
         # current task of the robot (free by default)
         self.robot_current_task = MESSAGE_TYPE_PRIORITY.STATUS_FREE
 
-        # list of all robots + self (initialized by the initializer)
+        # list of all robots + self and their status, a FleetIndex (initialized by the initializer)
         self.known_robots = None
 
-        # dictionary of nearby robots and the last time I received a communication from it (updated in networkManager)
-        self.neighbors_last_com = None
+        # Time (in seconds) without communication after which a robot is considered OUT OF RANGE (CAN BE MODIFIED)
+        self.neighbor_expiry = 25.0
+        # nearby robots and the last time I received a communication from it (updated in networkManager)
+        self.neighbors = NeighborTable(self.neighbor_expiry)
+
+        # Heartbeat asking who's nearby (REPORT_STATUS) : its period (in seconds) goes from heartbeat_min_period, after a
+        # change of the neighborhood or of a status, up to heartbeat_max_period while nothing changes, multiplied by
+        # heartbeat_backoff at each heartbeat and varied by +/- heartbeat_jitter (relative) (CAN BE MODIFIED)
+        # The maximum period should stay well below neighbor_expiry, or the stable neighbors would expire.
+        self.heartbeat_min_period = 1.6
+        self.heartbeat_max_period = 8.0
+        self.heartbeat_backoff = 2.0
+        self.heartbeat_jitter = 0.2
+
+        # Report my position (REPORT_POSITION) when I moved more than position_report_distance (in meters)
+        # or turned more than position_report_heading (in degrees), at most every position_report_min_interval
+        # and at least every position_report_max_interval (in seconds) (CAN BE MODIFIED)
+        self.report_position = True
+        self.position_report_distance = 0.05
+        self.position_report_heading = 5.0
+        self.position_report_min_interval = 0.25
+        self.position_report_max_interval = 2.0
+        # Number of reports sent as a difference to the last full report (keyframe) before a new one (CAN BE MODIFIED)
+        self.position_report_keyframe = 10
+        self.position_reporter = PositionReporter(self.position_report_distance, self.position_report_heading,
+                                                  self.position_report_min_interval, self.position_report_max_interval,
+                                                  self.position_report_keyframe)
+        # Last reported position of the other robots (updated in networkManager)
+        self.fleet_positions = PositionTable()
+
+        # Collision avoidance : the robots closer than avoidance_radius (in meters) push the robot away,
+        # with a push of avoidance_gain when touching (the attraction of the destination is 1). 0 disables it (CAN BE MODIFIED)
+        self.avoidance_radius = 0.6
+        self.avoidance_gain = 1.5
+        # Age (in seconds) after which a reported position is ignored (CAN BE MODIFIED)
+        self.neighbor_position_max_age = 3.0
+        # Reported positions of the other robots indexed by a grid of avoidance_radius cells (updated in networkManager)
+        self.neighbor_index = SpatialIndex(self.avoidance_radius if self.avoidance_radius > 0.0 else 1.0)
 
         # Next and previous known robot in alphabetical order
         self.next_rob = None
@@ -51,8 +165,13 @@ class RobotUp:
         # boolean to remember if the robot has already call rolled
         self.is_callrolling = False
 
-        # List of next coordinates
-        self.next_coordinates: List[Coordinates] = []
+        # Queue of next coordinates, in the order they will be visited
+        self.next_coordinates = WaypointQueue()
+        # Reorder the next coordinates to minimize the travel (CAN BE MODIFIED)
+        # Disabled by default : the coordinates are visited in the order they have been received
+        self.optimize_waypoints = False
+        # Maximum CPU time (in ms) spent per tick reordering the next coordinates (CAN BE MODIFIED)
+        self.waypoint_planning_budget = 2.0
 
         # boolean to know if the robot has been stopped
         self.is_stopped = False
@@ -60,6 +179,7 @@ class RobotUp:
     def getDevice(self, name: str) -> Device:
         """
         Get a device by its name.
+        The device is resolved once, then it is taken from the registry of devices.
 
         Args:
             name (str): Name of the device.
@@ -67,7 +187,64 @@ class RobotUp:
         Returns:
             Device: Device object if found, None otherwise.
         """
-        return self.robot.getDevice(name)
+        device = self.devices.get(name)
+        if device is None:
+            device = self.robot.getDevice(name)
+            if device is not None:
+                self.devices[name] = device
+                # The device is enabled at its first access
+                if name in self.sampling_periods:
+                    self.set_sampling_period(device, self.sampling_periods[name])
+        return device
+
+    def set_sampling_profile(self, profile: dict):
+        """
+        Change the sampling period of devices, it can be done at any time.
+        The devices already resolved are changed now, the others at their first access (see getDevice).
+
+        Args:
+            profile (dict): Sampling period (in ms) by device name, None disables the device.
+        """
+        for name, period in profile.items():
+            self.sampling_periods[name] = period
+            device = self.devices.get(name)
+            if device is not None:
+                self.set_sampling_period(device, period)
+
+    def set_sampling_period(self, device: Device, period):
+        """
+        Enable a device with a sampling period rounded up to a multiple of the basic time step, or disable it.
+        The devices which can't be enabled (motors, emitter ...) are ignored.
+
+        Args:
+            device (Device): The device.
+            period (int): The sampling period in ms (0 is the basic time step), None disables the device.
+        """
+        if not callable(getattr(device, 'enable', None)):
+            return
+
+        if period is None:
+            device.disable()
+        else:
+            basic_time_step = int(self.getBasicTimeStep())
+            device.enable(max(1, math.ceil(period / basic_time_step)) * basic_time_step)
+
+    def get_manager(self, manager_class):
+        """
+        Get the manager of the robot of the given class (MovementManager, PositionManager ...).
+        It is created at the first call then shared, so the devices aren't fetched and reset by each user.
+
+        Args:
+            manager_class (type): Class of the manager, its constructor takes the robot.
+
+        Returns:
+            The manager of the robot.
+        """
+        manager = self.managers.get(manager_class)
+        if manager is None:
+            manager = manager_class(self)
+            self.managers[manager_class] = manager
+        return manager
 
     def getBasicTimeStep(self) -> float:
         """
@@ -87,9 +264,19 @@ class RobotUp:
         """
         return self.robot.getName()
 
+    def getTime(self) -> float:
+        """
+        Get the current simulation time.
+
+        Returns:
+            float: Simulation time in seconds.
+        """
+        return self.robot.getTime()
+
     def step(self, time_step):
         """
         Perform a simulation step with the given time step.
+        The packets sent since the last step are emitted first (and the metrics exported when due).
 
         Args:
             time_step (int, optional): Time step in milliseconds. Defaults to None.
@@ -97,19 +284,30 @@ class RobotUp:
         Returns:
             int: Result of the simulation step.
         """
-        self.robot.step(time_step)
-
-    def append(self, message: Message):
+        emitted = self.outbox.flush()
+        if self.metrics is not None:
+            self.metrics.count("packets_emitted", emitted)
+            self.metrics.gauge("outbox_backlog", len(self.outbox))
+            self.metrics.export_if_due()
+        if self.profiler is None:
+            return self.robot.step(time_step)
+
+        self.profiler.lap("emit")
+        result = self.robot.step(time_step)
+        self.profiler.end_tick("step")
+        return result
+
+    def append(self, message: Message) -> bool:
         """
-        Add a message to the list of messages, sorting it based on message priority.
+        Add a message to the queue of messages, ordered by message priority.
 
         Args:
-            message (Message): The message to append to the list.
+            message (Message): The message to append to the queue.
+
+        Returns:
+            bool: True if the message replaced a queued message from the same sender (coalescing).
         """
-        priority = MESSAGE_TYPE_PRIORITY.priority(str(message.message_type))
-        index = next((i for i, msg in enumerate(self.list_messages) if MESSAGE_TYPE_PRIORITY.priority(str(msg.message_type)) < priority),
-                     len(self.list_messages))
-        self.list_messages.insert(index, message)
+        return self.list_messages.push(message)
 
     def getKeyboard(self):
         """
@@ -0,0 +1,101 @@
+"""
+File:           SensorSnapshot.py
+Date:           October 2026
+Description:    Snapshot of the robot's pose (gps and compass), read at most once per simulation step.
+                All the users of a step share the same read-only pose instead of reading the sensors each time.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import math
+from RobotUp import *
+
+
+class Pose:
+    """
+    Read-only pose of the robot at a simulation time : position (x, y) and heading (in degrees, in [0, 360[).
+    It can be used as Coordinates of the robot.
+    """
+
+    __slots__ = ("time", "x", "y", "heading")
+
+    def __init__(self, time: float, x: float, y: float, heading: float):
+        """
+        Initialize the pose.
+
+        Args:
+            time (float): Simulation time of the reading.
+            x (float): X coordinate of the robot.
+            y (float): Y coordinate of the robot.
+            heading (float): Heading of the robot in degrees.
+        """
+        object.__setattr__(self, "time", time)
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+        object.__setattr__(self, "heading", heading)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Pose is read-only")
+
+    def __repr__(self) -> str:
+        return f"Pose(time={self.time}, x={self.x}, y={self.y}, heading={self.heading})"
+
+
+class SensorSnapshot:
+    """
+    Read the gps and the compass of the robot at most once per simulation step.
+    Shared by all the managers : get it with robot.get_manager(SensorSnapshot).
+
+    |!| the gps of the robot should be called "gps" (default name in webots) \n
+    |!| the compass of the robot should be called "compass" (default name in webots)
+    """
+
+    def __init__(self, robot: RobotUp):
+        """
+        Initialize the snapshot (the sensors are read at the first call of get_pose).
+
+        Args:
+            robot (RobotUp): The robot
+        """
+        self.robot = robot
+        self.gps = robot.getDevice("gps")
+        self.compass = robot.getDevice("compass")
+
+        self.pose = None
+
+        # Number of sensor readings (for debugging purposes)
+        self.read_count = 0
+
+    def get_pose(self) -> Pose:
+        """
+        Get the pose of the robot at the current simulation step.
+        The sensors are only read if the simulation time changed since the last reading.
+
+        Returns:
+            Pose: The pose of the robot.
+        """
+        now = self.robot.getTime()
+        if self.pose is None or self.pose.time != now:
+            self.pose = self.read(now)
+        return self.pose
+
+    def read(self, now: float) -> Pose:
+        """
+        Read the gps and the compass.
+
+        Args:
+            now (float): The current simulation time.
+
+        Returns:
+            Pose: The pose of the robot.
+        """
+        self.read_count += 1
+
+        position = self.gps.getValues()
+        compass_values = self.compass.getValues()
+
+        heading = math.degrees(math.atan2(compass_values[0], compass_values[1]))
+        if heading < 0.0:
+            heading += 360.0
+
+        return Pose(now, position[0], position[1], heading)
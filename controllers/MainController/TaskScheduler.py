@@ -0,0 +1,148 @@
+"""
+File:           TaskScheduler.py
+Date:           October 2026
+Description:    Cooperative scheduler of the robot's tasks.
+                A task is a generator advanced once per tick (it yields at the end of each tick and never calls
+                robot.step itself). The scheduler owns the single robot.step of the tick.
+                Only the task with the highest priority runs, the others are pre-empted until it ends.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+from RobotUp import *
+
+
+class Task:
+    """
+    A task managed by the TaskScheduler : a generator and its priority.
+    """
+
+    def __init__(self, name: str, generator, priority: int, order: int, on_end=None):
+        """
+        Initialize the task.
+
+        Args:
+            name (str): Name of the task (for debugging purposes).
+            generator (Generator): The generator doing the task, one tick per iteration.
+            priority (int): Priority of the task (the higher, the more prioritary).
+            order (int): Order of creation, the oldest task runs first among the same priority.
+            on_end (callable): Function called once when the task ends, finished or cancelled (even before its first tick).
+        """
+        self.name = name
+        self.generator = generator
+        self.priority = priority
+        self.order = order
+        self.on_end = on_end
+
+        # Number of ticks during which the task has run
+        self.ticks = 0
+        # Result of the task (value returned by the generator) once it is done
+        self.result = None
+        self.done = False
+
+    def end(self):
+        """
+        Mark the task as done and call its on_end function.
+        """
+        self.done = True
+        if self.on_end is not None:
+            self.on_end()
+
+
+class TaskScheduler:
+    """
+    Cooperative scheduler of the robot's tasks, advanced once per tick.
+    """
+
+    def __init__(self, robot: RobotUp):
+        """
+        Initialize the scheduler without task.
+
+        Args:
+            robot (RobotUp): The robot
+        """
+        self.robot = robot
+        self.time_step = int(self.robot.getBasicTimeStep())
+
+        self.tasks: List[Task] = []
+        self.task_counter = 0
+
+        # Number of ticks (simulation steps) done by the scheduler
+        self.tick_count = 0
+
+    def spawn(self, name: str, generator, priority: int, on_end=None) -> Task:
+        """
+        Add a task. It pre-empts the running task if its priority is higher.
+
+        Args:
+            name (str): Name of the task.
+            generator (Generator): The generator doing the task, one tick per iteration.
+            priority (int): Priority of the task (for example the priority of the message which asked for it).
+            on_end (callable): Function called once when the task ends, finished or cancelled.
+
+        Returns:
+            Task: The created task.
+        """
+        task = Task(name, generator, priority, self.task_counter, on_end)
+        self.task_counter += 1
+        self.tasks.append(task)
+        return task
+
+    def running(self):
+        """
+        Get the task that runs at this tick : the one with the highest priority, the oldest first.
+
+        Returns:
+            Task: The running task, None if there is no task.
+        """
+        if not self.tasks:
+            return None
+        return max(self.tasks, key=lambda task: (task.priority, -task.order))
+
+    def cancel(self, task: Task):
+        """
+        Cancel a task. Its generator is closed, then its on_end function is called.
+
+        Args:
+            task (Task): The task to cancel.
+        """
+        if task in self.tasks:
+            self.tasks.remove(task)
+            task.generator.close()
+            task.end()
+
+    def cancel_all(self):
+        """
+        Cancel all tasks.
+        """
+        for task in list(self.tasks):
+            self.cancel(task)
+
+    def run_tasks(self):
+        """
+        Advance the running task by one tick.
+        """
+        task = self.running()
+        if task is None:
+            return
+
+        task.ticks += 1
+        try:
+            next(task.generator)
+        except StopIteration as stop:
+            task.result = stop.value
+            self.tasks.remove(task)
+            task.end()
+
+    def step(self) -> int:
+        """
+        Do a tick : advance the running task, then do the single simulation step of the tick.
+
+        Returns:
+            int: Result of the simulation step (-1 when the simulation is over).
+        """
+        self.run_tasks()
+        if self.robot.profiler is not None:
+            self.robot.profiler.lap("motion")
+        self.tick_count += 1
+        return self.robot.step(self.time_step)
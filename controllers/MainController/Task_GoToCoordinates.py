@@ -7,55 +7,42 @@ Modifications:
 """
 
 from PositionManager import *
-from NetworkManager import *
 
 
 def go_to_coordinates(robot: RobotUp, target_coordinate: Coordinates):
     """
     Move the robot to the specified target coordinates.
+    It is a generator : each iteration does one tick of movement (the TaskScheduler does the simulation step).
+    It can be cancelled between two ticks (for example by a STOP message) by closing it.
 
     Args:
         robot (RobotUp) : The selected robot
         target_coordinate (Coordinates): The target coordinates.
-    """
-    print(f"{robot.getName()} : Moving to coordinates: ({target_coordinate.x}, {target_coordinate.y})")
 
-    # Get the time step of the current world.
-    timestep = int(robot.getBasicTimeStep())
+    Returns:
+        bool: True when the target position is reached.
+    """
+    robot.logger.info("task", "Moving to coordinates: (%s, %s)", target_coordinate.x, target_coordinate.y)
 
-    # Initialise PositionManager with the robot
-    position_manager = PositionManager(robot)
-    movement_manager = MovementManager(robot)
-    network_manager = NetworkManager(robot)
+    # Get the managers of the robot (created once, shared with the NetworkManager)
+    position_manager = robot.get_manager(PositionManager)
+    movement_manager = robot.get_manager(MovementManager)
 
-    # Tolerance values
+    # Tolerance value
     arrival_tolerance = 0.1
-    angle_tolerance = 3.0
-
-    target_achieved = False
-    priority_message = False
-
-    # Main loop:
-    while robot.step(timestep) != -1 and not target_achieved and not priority_message:
-
-        robot.step(timestep)
-
-        # Check if the robot has arrived at the target position
-        if not position_manager.is_arrived(target_coordinate, arrival_tolerance):
-            # Get the bearing angle to the target coordinates
-            angle_to_destination = position_manager.get_bearing_to_coordinate(target_coordinate)
 
-            # Rotate the robot until it faces the target coordinates
-            position_manager.rotate_to_destination(angle_to_destination, angle_tolerance)
+    # The destination is new, the past heading errors are forgotten
+    position_manager.heading_controller.reset()
 
-            # Move forward
-            movement_manager.move_forward()
+    # Check if the robot has arrived at the target position
+    while not position_manager.is_arrived(target_coordinate, arrival_tolerance):
+        # One control update : turn toward the target coordinates while moving forward
+        position_manager.steer_towards(target_coordinate)
 
-        else:
-            # Stop the robot when the target position is reached
-            movement_manager.stop()
-            print("Target position reached!")
-            target_achieved = True
+        # End of the tick
+        yield
 
-        case_executed = network_manager.update()
-        priority_message = case_executed == MESSAGE_TYPE_PRIORITY.STOP.value
+    # Stop the robot when the target position is reached
+    movement_manager.stop()
+    robot.logger.info("task", "Target position reached!")
+    return True
@@ -0,0 +1,222 @@
+"""
+File:           WaypointPlanner.py
+Date:           October 2026
+Description:    Queue of the next coordinates of the robot, and the planner reordering it to minimize the travel.
+                The route starts with a nearest neighbour construction, the new waypoints are inserted where they
+                cost the least, then the route is improved by 2-opt. The planning stops when its time budget is
+                exhausted and goes on at the next tick, so it never stalls a tick.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import math
+import time
+from collections import deque
+
+
+class WaypointQueue(deque):
+    """
+    Queue of the next coordinates of the robot, in the order they will be visited.
+    It remembers the waypoints added since the last planning (at the end of the queue).
+    """
+
+    def __init__(self, waypoints=()):
+        """
+        Initialize the queue.
+
+        Args:
+            waypoints (Iterable[Coordinates]): Initial waypoints (considered as not planned).
+        """
+        super().__init__(waypoints)
+
+        # Number of waypoints at the end of the queue added since the last planning
+        self.pending = len(self)
+        # True while the 2-opt improvement of the route hasn't converged
+        self.improving = False
+        # Progress of the 2-opt improvement : next row to try, and number of rows tried in a row without improvement
+        self.cursor = 0
+        self.clean_rows = 0
+
+    def append(self, coordinates):
+        """
+        Add a waypoint at the end of the queue (it will be inserted in the route at the next planning).
+
+        Args:
+            coordinates (Coordinates): The waypoint.
+        """
+        super().append(coordinates)
+        self.pending += 1
+
+    def popleft(self):
+        """
+        Remove and return the next waypoint.
+
+        Returns:
+            Coordinates: The next waypoint.
+        """
+        coordinates = super().popleft()
+        self.pending = min(self.pending, len(self))
+        self.cursor = 0
+        self.clean_rows = 0
+        return coordinates
+
+    def clear(self):
+        """
+        Remove all waypoints.
+        """
+        super().clear()
+        self.pending = 0
+        self.improving = False
+        self.cursor = 0
+        self.clean_rows = 0
+
+    def needs_planning(self) -> bool:
+        """
+        Check if the route has to be planned (new waypoints, or 2-opt not converged).
+
+        Returns:
+            bool: True if plan_waypoints has something to do.
+        """
+        return self.pending > 0 or self.improving
+
+
+def distance(a, b) -> float:
+    """
+    Get the distance between two coordinates.
+
+    Args:
+        a (Coordinates): First coordinates.
+        b (Coordinates): Second coordinates.
+
+    Returns:
+        float: The euclidean distance.
+    """
+    return math.hypot(a.x - b.x, a.y - b.y)
+
+
+def plan_waypoints(queue: WaypointQueue, start, time_budget: float):
+    """
+    Reorder the queue to minimize the travel from start through all the waypoints (open route).
+    The new waypoints are added to the route (nearest neighbour if there is no route yet, cheapest insertion
+    otherwise), then the route is improved by 2-opt until it converges or the time budget is exhausted.
+    If the budget is exhausted, the improvement goes on at the next call.
+
+    Args:
+        queue (WaypointQueue): The queue of waypoints, reordered in place.
+        start (Coordinates): Where the robot starts the route (its position, or its current destination).
+        time_budget (float): Maximum CPU time (in ms) spent planning.
+    """
+    deadline = time.process_time() + time_budget / 1000
+    route = list(queue)
+
+    if queue.pending:
+        planned = route[:len(route) - queue.pending]
+        new_waypoints = route[len(route) - queue.pending:]
+        if planned:
+            route = insert_cheapest(start, planned, new_waypoints)
+        else:
+            route = nearest_neighbour(start, new_waypoints, deadline)
+        queue.pending = 0
+        queue.improving = True
+        queue.cursor = 0
+        queue.clean_rows = 0
+
+    if queue.improving:
+        queue.improving = not two_opt(queue, start, route, deadline)
+
+    # Rebuild the queue in the planned order (without counting the waypoints as new)
+    deque.clear(queue)
+    deque.extend(queue, route)
+
+
+def nearest_neighbour(start, waypoints: list, deadline: float) -> list:
+    """
+    Build a route going each time to the nearest waypoint not visited yet.
+    If the deadline is reached, the remaining waypoints are kept in their order.
+
+    Args:
+        start (Coordinates): Start of the route.
+        waypoints (list): The waypoints to visit.
+        deadline (float): CPU time (time.process_time) at which the construction stops.
+
+    Returns:
+        list: The route.
+    """
+    remaining = list(waypoints)
+    route = []
+    current = start
+    while remaining and time.process_time() < deadline:
+        nearest = min(range(len(remaining)), key=lambda i: distance(current, remaining[i]))
+        current = remaining.pop(nearest)
+        route.append(current)
+    return route + remaining
+
+
+def insert_cheapest(start, route: list, waypoints: list) -> list:
+    """
+    Insert each waypoint in the route where it adds the least travel.
+
+    Args:
+        start (Coordinates): Start of the route.
+        route (list): The planned route.
+        waypoints (list): The waypoints to insert.
+
+    Returns:
+        list: The route with the waypoints.
+    """
+    route = list(route)
+    for waypoint in waypoints:
+        # Insertion at the end of the route
+        best_index = len(route)
+        best_cost = distance(route[-1] if route else start, waypoint)
+
+        previous = start
+        for index, following in enumerate(route):
+            cost = distance(previous, waypoint) + distance(waypoint, following) - distance(previous, following)
+            if cost < best_cost:
+                best_index = index
+                best_cost = cost
+            previous = following
+
+        route.insert(best_index, waypoint)
+    return route
+
+
+def two_opt(queue: WaypointQueue, start, route: list, deadline: float) -> bool:
+    """
+    Improve the route in place by reversing the segments which shorten it (2-opt), the start being fixed
+    and the end of the route free.
+    The rows (first index of the segment) are tried in turn from queue.cursor, at least one per call,
+    so an improvement stopped by the deadline goes on where it stopped at the next call.
+
+    Args:
+        queue (WaypointQueue): The queue of the route, keeping the progress of the improvement.
+        start (Coordinates): Start of the route.
+        route (list): The route to improve.
+        deadline (float): CPU time (time.process_time) at which the improvement stops.
+
+    Returns:
+        bool: True if the route can't be improved anymore, False if the deadline has been reached before.
+    """
+    rows = len(route) - 1
+    while queue.clean_rows < rows:
+        i = queue.cursor % rows
+        previous = route[i - 1] if i > 0 else start
+        improved = False
+        for j in range(i + 1, len(route)):
+            # Reverse route[i..j] : previous -> route[j] ... route[i] -> following
+            delta = distance(previous, route[j]) - distance(previous, route[i])
+            if j + 1 < len(route):
+                following = route[j + 1]
+                delta += distance(route[i], following) - distance(route[j], following)
+
+            if delta < -1e-9:
+                route[i:j + 1] = reversed(route[i:j + 1])
+                improved = True
+
+        queue.clean_rows = 0 if improved else queue.clean_rows + 1
+        queue.cursor = i + 1
+
+        if time.process_time() > deadline:
+            return queue.clean_rows >= rows
+    return True
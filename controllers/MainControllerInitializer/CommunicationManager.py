@@ -8,6 +8,9 @@ Modifications:
 """
 
 from RobotUpInitializer import *
+from MessageCodec import *
+from DuplicateCache import *
+from ReliableChannel import *
 
 
 class CommunicationManager:
@@ -31,23 +34,72 @@ class CommunicationManager:
         self.time_step = int(self.robot.getBasicTimeStep())
         self.max_send_counter = 5
 
+        # Wire format of the sent messages (received ones are decoded whatever their format)
+        self.codec = MessageCodec(robot.wire_format, robot.getName())
+
+        # Sequence number of the next message created here (with my name, it identifies the message)
+        self.sequence = 0
+        # Ids of the flooded messages already received (their copies are dropped) and already relayed (relayed only
+        # once). Only the flooded types (see MESSAGE_TYPE_PRIORITY.is_flooded) and the reliable messages (sent again
+        # until acknowledged) can come back : the other messages (positions, heartbeats, acknowledgements ...) would
+        # only push their ids out of the caches
+        self.received_ids = DuplicateCache(robot.getTime)
+        self.relayed_ids = DuplicateCache(robot.getTime)
+
+        # Acknowledgements and retransmissions of the reliable unicast messages, None if disabled
+        self.reliable = None
+        if robot.reliable_unicast:
+            self.reliable = ReliableChannel(robot.getTime, robot.reliable_window, robot.reliable_initial_timeout,
+                                            robot.reliable_max_retries)
+
     def send_message(self, msg: Message):
         """
-        Send a message to the appropriate recipient. \n
-        id_sender;message_type;payload;recipient
+        Send a message to the appropriate recipient, encoded in the wire format of the codec. \n
+        id_sender;message_type;send_counter;payload;recipient
+        The message is put in the outbox and emitted at the next simulation step (no step is spent here).
+        A new unicast message of a reliable type goes through the reliable channel (it is sent again until it is
+        acknowledged, and waits if too many messages for its recipient aren't acknowledged yet).
         Args:
             msg (Message): The message to be sent.
         """
-        # Construct the message to be sent
-        outgoing_msg = "{};{};{};{};{}".format(msg.id_sender, msg.message_type, msg.send_counter+1, msg.payload, msg.recipient)
-        print(self.robot.getName(), " : Send : ", outgoing_msg)
-        self.emitter.send(outgoing_msg)
-        self.robot.step(self.time_step)
+        if msg.origin is None and self.is_reliable(msg):
+            for message in self.reliable.send(msg.recipient, msg):
+                self.transmit(message)
+            return
+
+        self.transmit(msg)
+
+    def transmit(self, msg: Message):
+        """
+        Encode a message and put it in the outbox.
+        A new message (without origin) gets its id, a relayed (or sent again) message keeps its id.
+
+        Args:
+            msg (Message): The message to be sent.
+        """
+        if msg.origin is None:
+            msg.origin = self.robot.getName()
+            msg.sequence = self.sequence
+            self.sequence = (self.sequence + 1) % 65536
+
+            # If my own flooded message comes back, it is neither processed nor relayed
+            if MESSAGE_TYPE_PRIORITY.is_flooded(msg.message_type):
+                self.received_ids.check(self.message_key(msg))
+                self.relayed_ids.check((msg.origin, msg.sequence))
+
+        self.robot.logger.debug("radio", "Send : %s", msg)
+        packet = self.codec.encode(msg)
+        self.robot.outbox.push(packet)
+
+        metrics = self.robot.metrics
+        if metrics is not None:
+            metrics.count("sent." + msg.message_type.name)
+            metrics.count("bytes_sent", len(packet))
 
     def send_message_all(self, id_sender: str, message_type: MESSAGE_TYPE_PRIORITY, send_counter: int,
                          payload: str = ""):
         """
-        Send the message to all known robots.
+        Send the message to everyone in range, in a single broadcast packet (no recipient).
         |!| It didn't mean that they will receive it (they should be in range to receive it)
 
         Args:
@@ -56,40 +108,221 @@ class CommunicationManager:
             send_counter (int): Number of times the message has been transmitted.
             payload (str): content of the message ("" by default).
         """
-        for robot_name in self.robot.known_robots:
-            self.send_message(Message(id_sender, message_type, send_counter, payload, robot_name))
+        self.send_message(Message(id_sender, message_type, send_counter, payload))
+
+    def send_message_group(self, id_sender: str, message_type: MESSAGE_TYPE_PRIORITY, send_counter: int,
+                           payload: str, recipients):
+        """
+        Send the message to a group of robots, in a single multicast packet.
+        Each receiver checks if it is part of the group (a single bit test when the fleet table is known).
+
+        Args:
+            id_sender (str): ID of the sender (webots's name).
+            message_type (MESSAGE_TYPE_PRIORITY): Message type from the enumeration MESSAGE_TYPE_PRIORITY.
+            send_counter (int): Number of times the message has been transmitted.
+            payload (str): content of the message.
+            recipients (Iterable[str]): Names of the recipients. The sender itself is not sent the message.
+        """
+        recipients = frozenset(recipients) - {self.robot.getName()}
+        if len(recipients) == 1:
+            recipients = next(iter(recipients))
+        if recipients:
+            self.send_message(Message(id_sender, message_type, send_counter, payload, recipients))
 
     def receive_message(self):
         """
         Receive messages from the communication channel.
         If there is no recipient, or the robot is the recipient, It adds it in its list of messages.
         As soon as it has been read the message is deleted from the receiver's buffer.
+        The messages are the ones received at the last step, this method doesn't do a step itself.
         """
-        self.robot.step(self.time_step)
+        metrics = self.robot.metrics
 
         # Iterate over the received messages based on the queue length
         for _ in range(self.receiver.getQueueLength()):
-            incoming_msg = self.receiver.getString()
+            packet = self.receiver.getBytes()
             self.receiver.nextPacket()
+            if metrics is not None:
+                metrics.count("packets_received")
+                metrics.count("bytes_received", len(packet))
+
+            # The recipient is checked in the header, the payload is only decoded if the message is for me.
+            # A malformed packet is dropped, it must not stop the controller
             try:
-                if incoming_msg:
-                    # Split the incoming message into its parts
-                    id_sender, message_type, send_counter, payload, recipient = incoming_msg.split(";")
+                message = self.codec.decode(packet, self.is_for_me)
+            except ValueError as error:
+                self.robot.logger.warning("radio", "Malformed packet dropped : %s", error)
+                if metrics is not None:
+                    metrics.count("dropped.malformed")
+                continue
+
+            if message is None:
+                if metrics is not None:
+                    metrics.count("dropped.not_for_me")
+                continue
+
+            # The acknowledgements and the reliable messages go through the reliable channel before the
+            # duplicates check : the copy of a reliable message is acknowledged again, then dropped by the channel
+            if message.message_type == MESSAGE_TYPE_PRIORITY.ACK:
+                self.receive_ack(message)
+                continue
+            if message.reliable_sequence is not None and self.reliable is not None:
+                for delivered in self.reliable.receive(message.id_sender, message):
+                    self.deliver(delivered)
+                continue
+
+            # The copies of an already received message are dropped (flooded messages, and the retransmissions of the
+            # reliable messages not handled by my reliable channel)
+            if self.is_duplicate(message):
+                if metrics is not None:
+                    metrics.count("dropped.duplicate")
+                continue
+
+            self.deliver(message)
+
+        self.update_reliable()
+
+    def deliver(self, message: Message):
+        """
+        Add a received message to the robot's list of messages.
+
+        Args:
+            message (Message): The received message.
+        """
+        # The fleet table is set as soon as it is received, the next packets may already use it
+        if message.message_type == MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE:
+            self.codec.set_fleet(message.payload.split(":"))
+
+        # Print the message for debugging purposes
+        self.robot.logger.debug("radio", "Receive : %s", message)
+
+        metrics = self.robot.metrics
+        if metrics is not None:
+            metrics.count("received." + message.message_type.name)
+            message.received_time = self.robot.getTime()
+
+        # Add the Message to the robot's list ordered by priority
+        coalesced = self.robot.append(message)
+        if coalesced and metrics is not None:
+            metrics.count("coalesced." + message.message_type.name)
+
+    def is_for_me(self, recipient: str, send_counter: int) -> bool:
+        """
+        Check if a received message should be considered.
 
-                    send_counter = int(send_counter)
-                    # If there is no recipient, or I'm the recipient or the counter is < Max, consider the message
-                    if recipient == "" or recipient == self.robot.getName() and send_counter < self.max_send_counter:
-                        # Print the message for debugging purposes
-                        print_message_type = message_type.replace("MESSAGE_TYPE_PRIORITY.", "")
-                        print(self.robot.getName(), " : Receive : ", id_sender, ";", print_message_type, ";",
-                              send_counter, ";", payload, ";", recipient)
+        Args:
+            recipient (str): The recipient of the message.
+            send_counter (int): Number of times the message has been transmitted.
 
-                        # Create and add the Message to the robot's list ordered by priority
-                        self.robot.append(Message(id_sender, message_type, send_counter, payload, recipient))
+        Returns:
+            bool: True if there is no recipient, or I'm the recipient and the counter is < Max.
+        """
+        return recipient == "" or recipient == self.robot.getName() and send_counter < self.max_send_counter
 
-            except ValueError:
-                # If there are not enough parts in the message, or it cannot be split properly
-                raise ValueError("Invalid message format: '{}'".format(incoming_msg))
+    def relay(self, msg: Message) -> bool:
+        """
+        Relay a flooded message, only once per message id.
+
+        Args:
+            msg (Message): The message to relay, with the origin and sequence of the received message.
+
+        Returns:
+            bool: True if the message has been sent, False if it had already been relayed.
+        """
+        if msg.origin is not None and self.relayed_ids.check((msg.origin, msg.sequence)):
+            return False
+        self.send_message(msg)
+        return True
+
+    def is_reliable(self, msg: Message) -> bool:
+        """
+        Check if a message has to be sent through the reliable channel : a message of a reliable type
+        (see MESSAGE_TYPE_PRIORITY.is_reliable) for a single known robot, when the reliable channel is enabled.
+        A recipient nobody knows (not in known_robots) would never acknowledge : its message is sent once.
+
+        Args:
+            msg (Message): The message to send.
+
+        Returns:
+            bool: True if the message has to be delivered reliably.
+        """
+        if self.reliable is None or not isinstance(msg.recipient, str) or msg.recipient == self.robot.getName():
+            return False
+        known_robots = self.robot.known_robots
+        return (known_robots is not None and msg.recipient in known_robots
+                and MESSAGE_TYPE_PRIORITY.is_reliable(msg.message_type))
+
+    def receive_ack(self, msg: Message):
+        """
+        Read an acknowledgement for me : the acknowledged messages leave the window, and the waiting ones are sent.
+
+        Args:
+            msg (Message): The ACK message, its payload is the sequence number expected next by its sender.
+        """
+        if self.reliable is None or msg.recipient != self.robot.getName():
+            return
+        try:
+            cumulative = int(msg.payload)
+        except ValueError:
+            return
+
+        for message in self.reliable.acknowledge(msg.id_sender, cumulative):
+            self.transmit(message)
+
+    def update_reliable(self):
+        """
+        Send the acknowledgements of the reliable messages received during the tick (one per sender),
+        and send again the reliable messages whose acknowledgement hasn't come in time.
+        """
+        if self.reliable is None:
+            return
+
+        for peer, cumulative in self.reliable.take_acks().items():
+            self.transmit(Message(self.robot.getName(), MESSAGE_TYPE_PRIORITY.ACK, 0, str(cumulative), peer))
+
+        resend, dropped = self.reliable.retransmissions()
+        for message in resend:
+            self.transmit(message)
+        for peer, message in dropped:
+            self.robot.logger.warning("radio", "%s unreachable, message dropped : %s", peer, message)
+
+        metrics = self.robot.metrics
+        if metrics is not None:
+            metrics.count("reliable.retransmitted", len(resend))
+            metrics.count("reliable.dropped", len(dropped))
+            metrics.gauge("reliable.in_flight", self.reliable.in_flight())
+
+    def is_duplicate(self, msg: Message) -> bool:
+        """
+        Check if a received flooded or reliable message is a copy of an already received one, and remember it.
+        The reliable messages which don't go through my reliable channel (disabled, or heard for another robot)
+        are checked here, their retransmissions keep their id.
+        Messages without id (old wire format) and the other messages are never considered as duplicates.
+
+        Args:
+            msg (Message): The received message.
+
+        Returns:
+            bool: True if the message has already been received.
+        """
+        return (msg.origin is not None
+                and (msg.reliable_sequence is not None or MESSAGE_TYPE_PRIORITY.is_flooded(msg.message_type))
+                and self.received_ids.check(self.message_key(msg)))
+
+    @staticmethod
+    def message_key(msg: Message) -> tuple:
+        """
+        Get the key used to recognize the copies of a message.
+
+        Args:
+            msg (Message): The message.
+
+        Returns:
+            tuple: (origin, sequence), plus the sender for a roll call (each robot relaying it announces itself).
+        """
+        if MESSAGE_TYPE_PRIORITY.from_string(msg.message_type) == MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL:
+            return msg.origin, msg.sequence, msg.id_sender
+        return msg.origin, msg.sequence
 
     @staticmethod
     def is_the_message_prioritary(msg: Message, current_task: MESSAGE_TYPE_PRIORITY) -> bool:
@@ -115,4 +348,4 @@ class CommunicationManager:
         while self.receiver.getQueueLength() > 0:
             self.receiver.nextPacket()
         self.robot.list_messages.clear()
-        print(self.robot.getName(), " : All messages cleared")
+        self.robot.logger.info("radio", "All messages cleared")
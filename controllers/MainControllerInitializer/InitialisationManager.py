@@ -11,18 +11,13 @@ from RobotUpInitializer import *
 
 def init_devices(robot: RobotUpInitializer):
     """
-    Enable all devices of the robot with a simulation time_step of 10 (ms).
-    time_step value can be modified.
+    Apply the sampling profile of the robot (see sampling_profile in RobotUpInitializer) :
+    only the devices used by the controller are enabled, each one at its own period, at its first access.
+    The devices which aren't in the profile (unused sensors) stay disabled.
 
     Args:
         robot (RobotUpInitializer): The robot to initialize
     """
-    time_step = 10
-
-    # Loop through each device and attempt to enable it if the enable method exists
-    for device_name in robot.robot.devices:
-        device = robot.robot.devices[device_name]
-        if hasattr(device, 'enable') and callable(getattr(device, 'enable')):
-            device.enable(time_step)
+    robot.set_sampling_profile(robot.sampling_profile)
 
     print(robot.getName(), "has been enabled")
@@ -28,6 +28,9 @@ time_step = robot.getBasicTimeStep()
 init_devices(robot)
 
 network_manager = NetworkManagerInitialiseur(robot)
+
+# Profiling of the ticks (phases, real-time factor, stack sampler), enabled by the environment variable ROBOT_PROFILE
+robot.profiler = Profiler.from_environment(robot.getName(), robot.getTime, robot.logger)
 # ---------------------------------
 
 # Loop until all robots are detected
@@ -45,3 +48,6 @@ print("-------------------------------------------------------------------------
 all_known_robots = ":".join(robot.known_robots.keys())
 message = Message(robot.getName(), MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE, 0, all_known_robots)
 network_manager.communication.send_message(message)
+
+# The message leaves at the next step
+robot.step(int(time_step))
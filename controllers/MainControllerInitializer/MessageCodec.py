@@ -0,0 +1,469 @@
+"""
+File:           MessageCodec.py
+Date:           October 2026
+Description:    Encode and decode the messages sent on the radio.
+                Two wire formats are available and can be selected per controller :
+                    - "text"   : id_sender;message_type;send_counter;payload;recipient;origin;sequence
+                                 (historical format followed by the message id, the origin is empty when it is
+                                 the sender), a group of recipients is written name1,name2,...
+                                 The sequence of a reliable message is followed by +reliable_sequence.
+                    - "binary" : versioned compact format (one byte type, compact ids, fixed-width coordinates)
+                Both formats are always accepted on reception, so mixed fleets keep working.
+
+                Binary packet (little-endian) :
+                    version (1 byte) | type (1 byte) | send_counter (1 byte) | recipient id | sender id |
+                    origin id (empty when it is the sender) | sequence (2 bytes) |
+                    reliable sequence (2 bytes, only if the bit 0x80 of the type is set) | payload kind (1 byte) | payload
+                The recipient comes first so a packet for someone else is dropped before its payload is decoded.
+                The recipient can be empty (broadcast), a name (unicast) or a group of names (multicast),
+                sent as a bitmap over the fleet table (one bit test on reception) or as a list of ids.
+                Version 2 added the groups of recipients, version 3 the message id (origin, sequence),
+                version 4 the reliable sequence.
+                Version 1 and 2 packets are still decoded (without message id), version 3 without reliable sequence.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import struct
+from Message import *
+
+# First byte of a binary packet. Bytes 0xF8-0xFF never start an UTF-8 text, so text packets can't be mistaken.
+BINARY_VERSION = 0xFC
+BINARY_VERSIONS = (0xF9, 0xFA, 0xFB, 0xFC)
+
+# Bit of the type byte telling that a reliable sequence follows the sequence (version 4)
+TYPE_RELIABLE_FLAG = 0x80
+
+# Id field : 0 = empty, 0x80 | n = n-th robot of the fleet table, otherwise length of the inline name
+ID_EMPTY = 0x00
+ID_FLEET_FLAG = 0x80
+ID_INLINE_MAX = 0x7D
+# Recipient field only : group of recipients
+ID_GROUP_BITMAP = 0x7E      # 1 byte length + bitmap over the fleet table
+ID_GROUP_LIST = 0x7F        # 1 byte count + ids
+
+# Kinds of payload of a binary packet
+PAYLOAD_EMPTY = 0               # ""
+PAYLOAD_TEXT = 1                # any string (2 bytes length + UTF-8)
+PAYLOAD_COORDINATES = 2         # "x:y" (2 float32)
+PAYLOAD_TYPED_COORDINATES = 3   # "MESSAGE_TYPE_PRIORITY.X:x:y" (1 byte type + 2 float32)
+PAYLOAD_TYPE = 4                # "MESSAGE_TYPE_PRIORITY.X" (1 byte type)
+PAYLOAD_POSE_FULL = 5           # "F:k:x:y:h" position report (1 byte keyframe + 3 int16)
+PAYLOAD_POSE_DELTA = 6          # "D:k:dx:dy:dh" position report (1 byte keyframe + 3 int8)
+
+_HEADER = struct.Struct("<BBB")
+_COORDINATES = struct.Struct("<ff")
+_FLOAT32 = struct.Struct("<f")
+_TEXT_LENGTH = struct.Struct("<H")
+_SEQUENCE = struct.Struct("<H")
+_POSE_FULL = struct.Struct("<Bhhh")
+_POSE_DELTA = struct.Struct("<Bbbb")
+_POSE_KINDS = {"F": (PAYLOAD_POSE_FULL, _POSE_FULL), "D": (PAYLOAD_POSE_DELTA, _POSE_DELTA)}
+
+_TYPE_BY_STRING = {str(message_type): message_type for message_type in MESSAGE_TYPE_PRIORITY}
+
+
+class MessageCodec:
+    """
+    Encode and decode the messages sent on the radio, in text or binary wire format.
+    """
+
+    def __init__(self, wire_format: str = "binary", name: str = ""):
+        """
+        Initialize the codec.
+
+        Args:
+            wire_format (str): Format used to send the messages, "binary" (by default) or "text".
+                               Received messages are decoded whatever their format.
+            name (str): Name of the owner of the codec, used to check if it is part of a group of recipients.
+        """
+        if wire_format not in ("binary", "text"):
+            raise ValueError("Unknown wire format: '{}'".format(wire_format))
+        self.wire_format = wire_format
+        self.name = name
+
+        # Fleet table (shared by the initializer) used to send robot's names as a one byte index
+        self.fleet = []
+        self.fleet_ids = {}
+        self.own_index = None
+
+    def set_fleet(self, names):
+        """
+        Set the fleet table. Every robot receives the same list from the initializer,
+        so the index of a name in it can replace the name on the radio.
+
+        Args:
+            names (list): Names of all robots, in the order shared by the initializer.
+        """
+        self.fleet = list(names)[:ID_FLEET_FLAG]
+        self.fleet_ids = {name: index for index, name in enumerate(self.fleet)}
+        self.own_index = self.fleet_ids.get(self.name)
+
+    def encode(self, msg: Message) -> bytes:
+        """
+        Encode a message in the wire format of the codec.
+
+        Args:
+            msg (Message): The message to encode. Its send_counter is sent incremented by one.
+                           Its recipient is "" (everyone), a name, or a collection of names.
+                           Its origin and sequence should be set (see CommunicationManager.send_message).
+
+        Returns:
+            bytes: The packet to send.
+        """
+        origin = "" if msg.origin == msg.id_sender else msg.origin
+        sequence = msg.sequence % 65536
+
+        if self.wire_format == "text":
+            recipient = msg.recipient if isinstance(msg.recipient, str) else ",".join(sorted(msg.recipient))
+            if msg.reliable_sequence is not None:
+                sequence = "{}+{}".format(sequence, msg.reliable_sequence)
+            return "{};{};{};{};{};{};{}".format(msg.id_sender, msg.message_type, msg.send_counter + 1,
+                                                msg.payload, recipient, origin, sequence).encode("utf-8")
+
+        message_type = MESSAGE_TYPE_PRIORITY.from_string(msg.message_type)
+        type_id = message_type.value
+        if msg.reliable_sequence is not None:
+            type_id |= TYPE_RELIABLE_FLAG
+        packet = bytearray(_HEADER.pack(BINARY_VERSION, type_id, min(msg.send_counter + 1, 255)))
+        if isinstance(msg.recipient, str):
+            self._encode_id(packet, msg.recipient)
+        else:
+            self._encode_group(packet, msg.recipient)
+        self._encode_id(packet, msg.id_sender)
+        self._encode_id(packet, origin)
+        packet += _SEQUENCE.pack(sequence)
+        if msg.reliable_sequence is not None:
+            packet += _SEQUENCE.pack(msg.reliable_sequence)
+        self._encode_payload(packet, str(msg.payload))
+        return bytes(packet)
+
+    def decode(self, packet: bytes, accept=None):
+        """
+        Decode a packet (text or binary).
+
+        Args:
+            packet (bytes): The received packet.
+            accept (callable): Function (recipient, send_counter) -> bool called once the header is decoded.
+                               If it returns False, the payload is not decoded. None accepts everything.
+                               For a group of recipients, it is called with the name of the codec if it is
+                               part of the group (the message is refused otherwise).
+
+        Returns:
+            Message: The decoded message, None if it has been refused.
+                     The recipient of a message accepted by None can be a frozenset of names.
+
+        Raises:
+            ValueError: If the packet is malformed.
+        """
+        if not packet:
+            raise ValueError("Empty packet")
+
+        if packet[0] in BINARY_VERSIONS:
+            return self._decode_binary(packet, accept)
+        if packet[0] >= 0xF8:
+            raise ValueError("Unsupported wire format version: {}".format(packet[0]))
+        return self._decode_text(packet, accept)
+
+    def _decode_text(self, packet: bytes, accept):
+        """
+        Decode a text packet. The payload may contain ';' : the fields are split from both ends.
+        A packet of the old layout (id_sender;message_type;send_counter;payload;recipient) has no id :
+        its origin and sequence are None.
+        """
+        try:
+            id_sender, message_type, send_counter, rest = packet.decode("utf-8").split(";", 3)
+            send_counter = int(send_counter)
+            fields = rest.rsplit(";", 3)
+            if len(fields) == 4 and _is_sequence(fields[3]):
+                payload, recipient, origin, sequence = fields
+                sequence, _, reliable_sequence = sequence.partition("+")
+                sequence = int(sequence)
+                reliable_sequence = int(reliable_sequence) if reliable_sequence else None
+            else:
+                payload, recipient = rest.rsplit(";", 1)
+                origin, sequence, reliable_sequence = None, None, None
+        except (UnicodeDecodeError, ValueError):
+            raise ValueError("Invalid message format: '{}'".format(packet))
+
+        if "," in recipient:
+            group = frozenset(recipient.split(","))
+            if accept is None:
+                recipient = group
+            elif self.name in group:
+                recipient = self.name
+            else:
+                return None
+
+        if accept is not None and not accept(recipient, send_counter):
+            return None
+        if sequence is not None:
+            origin = origin or id_sender
+        return Message(id_sender, MESSAGE_TYPE_PRIORITY.from_string(message_type), send_counter, payload, recipient,
+                       origin, sequence, reliable_sequence)
+
+    def _decode_binary(self, packet: bytes, accept):
+        """
+        Decode a binary packet. The recipient is checked before the payload is decoded.
+        """
+        try:
+            version, type_id, send_counter = _HEADER.unpack_from(packet, 0)
+            is_reliable = version >= 0xFC and bool(type_id & TYPE_RELIABLE_FLAG)
+            if is_reliable:
+                type_id ^= TYPE_RELIABLE_FLAG
+
+            if packet[_HEADER.size] in (ID_GROUP_BITMAP, ID_GROUP_LIST):
+                if accept is None:
+                    recipient, offset = self._decode_group(packet, _HEADER.size)
+                else:
+                    is_member, offset = self._is_group_member(packet, _HEADER.size)
+                    if not is_member:
+                        return None
+                    recipient = self.name
+            else:
+                recipient, offset = self._decode_id(packet, _HEADER.size)
+
+            if accept is not None and not accept(recipient, send_counter):
+                return None
+
+            id_sender, offset = self._decode_id(packet, offset)
+
+            origin, sequence = None, None
+            if version >= 0xFB:
+                origin, offset = self._decode_id(packet, offset)
+                origin = origin or id_sender
+                (sequence,) = _SEQUENCE.unpack_from(packet, offset)
+                offset += _SEQUENCE.size
+
+            reliable_sequence = None
+            if is_reliable:
+                (reliable_sequence,) = _SEQUENCE.unpack_from(packet, offset)
+                offset += _SEQUENCE.size
+
+            payload = self._decode_payload(packet, offset)
+            return Message(id_sender, MESSAGE_TYPE_PRIORITY(type_id), send_counter, payload, recipient, origin, sequence,
+                           reliable_sequence)
+        except (struct.error, IndexError, UnicodeDecodeError, ValueError):
+            raise ValueError("Invalid message format: '{}'".format(packet))
+
+    def _encode_id(self, packet: bytearray, name: str):
+        """
+        Append a sender/recipient id : its index in the fleet table if known, the inline name otherwise.
+        """
+        if not name:
+            packet.append(ID_EMPTY)
+            return
+
+        index = self.fleet_ids.get(name)
+        if index is not None:
+            packet.append(ID_FLEET_FLAG | index)
+        else:
+            encoded_name = name.encode("utf-8")
+            if len(encoded_name) > ID_INLINE_MAX:
+                raise ValueError("Name too long to be sent: '{}'".format(name))
+            packet.append(len(encoded_name))
+            packet += encoded_name
+
+    def _decode_id(self, packet: bytes, offset: int):
+        """
+        Read a sender/recipient id.
+
+        Returns:
+            tuple: (name, offset of the next field)
+        """
+        field = packet[offset]
+        offset += 1
+        if field & ID_FLEET_FLAG:
+            index = field ^ ID_FLEET_FLAG
+            if index >= len(self.fleet):
+                raise ValueError("Unknown fleet index: {}".format(index))
+            return self.fleet[index], offset
+        if field > ID_INLINE_MAX:
+            raise ValueError("Unexpected group of recipients")
+        return packet[offset:offset + field].decode("utf-8"), offset + field
+
+    def _encode_group(self, packet: bytearray, names):
+        """
+        Append a group of recipients : a bitmap over the fleet table if every name is in it
+        and the bitmap is the shortest, the list of their ids otherwise.
+        """
+        names = sorted(set(names))
+        indexes = [self.fleet_ids.get(name) for name in names]
+
+        if names and None not in indexes and (max(indexes) // 8 + 1) <= len(names):
+            bitmap = bytearray(max(indexes) // 8 + 1)
+            for index in indexes:
+                bitmap[index // 8] |= 1 << (index % 8)
+            packet.append(ID_GROUP_BITMAP)
+            packet.append(len(bitmap))
+            packet += bitmap
+        else:
+            packet.append(ID_GROUP_LIST)
+            packet.append(len(names))
+            for name in names:
+                self._encode_id(packet, name)
+
+    def _decode_group(self, packet: bytes, offset: int):
+        """
+        Read a group of recipients.
+
+        Returns:
+            tuple: (frozenset of names, offset of the next field)
+        """
+        kind, length = packet[offset], packet[offset + 1]
+        offset += 2
+        if kind == ID_GROUP_BITMAP:
+            names = [self.fleet[index] for index in range(min(length * 8, len(self.fleet)))
+                     if packet[offset + index // 8] & (1 << (index % 8))]
+            return frozenset(names), offset + length
+
+        names = []
+        for _ in range(length):
+            name, offset = self._decode_id(packet, offset)
+            names.append(name)
+        return frozenset(names), offset
+
+    def _is_group_member(self, packet: bytes, offset: int):
+        """
+        Check if the owner of the codec is part of a group of recipients, without building the group.
+        With a bitmap, it is a single bit test.
+
+        Returns:
+            tuple: (True if the owner is in the group, offset of the next field)
+        """
+        kind, length = packet[offset], packet[offset + 1]
+        offset += 2
+        if kind == ID_GROUP_BITMAP:
+            index = self.own_index
+            is_member = (index is not None and index // 8 < length
+                         and bool(packet[offset + index // 8] & (1 << (index % 8))))
+            return is_member, offset + length
+
+        is_member = False
+        for _ in range(length):
+            name, offset = self._decode_id(packet, offset)
+            is_member = is_member or name == self.name
+        return is_member, offset
+
+    @staticmethod
+    def _encode_payload(packet: bytearray, payload: str):
+        """
+        Append the payload with the most compact kind able to give it back.
+        The coordinates sent as float32 come back with the same values, written as floats ("1:2" -> "1.0:2.0").
+        """
+        if payload == "":
+            packet.append(PAYLOAD_EMPTY)
+            return
+
+        message_type = _TYPE_BY_STRING.get(payload)
+        if message_type is not None:
+            packet.append(PAYLOAD_TYPE)
+            packet.append(message_type.value)
+            return
+
+        parts = payload.split(":")
+        if len(parts) == 2:
+            coordinates = _to_float32(parts[0]), _to_float32(parts[1])
+            if None not in coordinates:
+                packet.append(PAYLOAD_COORDINATES)
+                packet += _COORDINATES.pack(*coordinates)
+                return
+
+        elif len(parts) == 3 and parts[0] in _TYPE_BY_STRING:
+            coordinates = _to_float32(parts[1]), _to_float32(parts[2])
+            if None not in coordinates:
+                packet.append(PAYLOAD_TYPED_COORDINATES)
+                packet.append(_TYPE_BY_STRING[parts[0]].value)
+                packet += _COORDINATES.pack(*coordinates)
+                return
+
+        elif len(parts) == 5 and parts[0] in _POSE_KINDS:
+            kind, pose_struct = _POSE_KINDS[parts[0]]
+            values = _to_int(parts[1:])
+            if values is not None:
+                try:
+                    encoded_pose = pose_struct.pack(*values)
+                except struct.error:
+                    encoded_pose = None
+                if encoded_pose is not None:
+                    packet.append(kind)
+                    packet += encoded_pose
+                    return
+
+        encoded_payload = payload.encode("utf-8")
+        packet.append(PAYLOAD_TEXT)
+        packet += _TEXT_LENGTH.pack(len(encoded_payload))
+        packet += encoded_payload
+
+    @staticmethod
+    def _decode_payload(packet: bytes, offset: int) -> str:
+        """
+        Read the payload and give it back as the string that has been sent
+        (except the coordinates sent as float32 : same values, written as floats).
+        """
+        kind = packet[offset]
+        offset += 1
+
+        if kind == PAYLOAD_EMPTY:
+            return ""
+        if kind == PAYLOAD_TYPE:
+            return str(MESSAGE_TYPE_PRIORITY(packet[offset]))
+        if kind == PAYLOAD_COORDINATES:
+            x, y = _COORDINATES.unpack_from(packet, offset)
+            return "{}:{}".format(_from_float32(x), _from_float32(y))
+        if kind == PAYLOAD_TYPED_COORDINATES:
+            x, y = _COORDINATES.unpack_from(packet, offset + 1)
+            return "{}:{}:{}".format(MESSAGE_TYPE_PRIORITY(packet[offset]), _from_float32(x), _from_float32(y))
+        if kind == PAYLOAD_POSE_FULL:
+            return "F:{}:{}:{}:{}".format(*_POSE_FULL.unpack_from(packet, offset))
+        if kind == PAYLOAD_POSE_DELTA:
+            return "D:{}:{}:{}:{}".format(*_POSE_DELTA.unpack_from(packet, offset))
+        if kind == PAYLOAD_TEXT:
+            (length,) = _TEXT_LENGTH.unpack_from(packet, offset)
+            offset += _TEXT_LENGTH.size
+            return packet[offset:offset + length].decode("utf-8")
+
+        raise ValueError("Unknown payload kind: {}".format(kind))
+
+
+def _is_sequence(text: str) -> bool:
+    """
+    Check if the last field of a text packet is a sequence number ("12" or "12+3" with the reliable sequence).
+    """
+    sequence, _, reliable_sequence = text.partition("+")
+    return sequence.isdigit() and (reliable_sequence == "" or reliable_sequence.isdigit())
+
+
+def _to_float32(text: str):
+    """
+    Convert a coordinate to float32 if its value can be given back without loss (it comes back written as a float).
+
+    Returns:
+        float: The float32 value, None if the coordinate can't be sent as a float32.
+    """
+    try:
+        (value32,) = _FLOAT32.unpack(_FLOAT32.pack(float(text)))
+    except (ValueError, OverflowError):
+        return None
+    return value32 if _from_float32(value32) == float(text) else None
+
+
+def _to_int(texts):
+    """
+    Convert integers written in a payload, if they can be given back exactly.
+
+    Returns:
+        list: The integers, None if one of the texts isn't written as an integer.
+    """
+    try:
+        values = [int(text) for text in texts]
+    except ValueError:
+        return None
+    return values if [str(value) for value in values] == list(texts) else None
+
+
+def _from_float32(value32: float) -> float:
+    """
+    Give back the shortest float matching a float32 (0.1f -> 0.1 and not 0.10000000149011612).
+    """
+    return float(format(value32, ".7g"))
@@ -0,0 +1,192 @@
+"""
+File:           MessageQueue.py
+Date:           October 2026
+Description:    Priority queue of the messages waiting to be processed.
+                Messages are stored in one FIFO level per priority, the non-empty levels are kept in a heap.
+                Insert in O(log p) and peek/pop in O(1) (p = number of priority levels, not of messages).
+                With the aging, peek/pop compare the head of each level : O(p) instead of O(1).
+                With the coalescing, a message whose type is coalesced (see MESSAGE_TYPE_PRIORITY.is_coalesced)
+                replaces in place the queued message of the same type from the same sender, so the queue holds
+                at most one such message per sender and type. A position delta doesn't replace a queued keyframe
+                (the delta is relative to it) : it is queued after it.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import heapq
+from collections import deque
+from Message import *
+
+# Prefix of the payload of a full position report (keyframe, see PositionReport)
+FULL_POSITION_REPORT = "F:"
+
+# Highest priority reachable by the aging : one level below STOP, which always goes first
+MAX_AGED_PRIORITY = MESSAGE_TYPE_PRIORITY.priority(MESSAGE_TYPE_PRIORITY.STOP) - 1
+
+
+class MessageQueue:
+    """
+    Priority queue of the messages waiting to be processed.
+    The message with the highest priority is served first, messages with the same priority are served in arrival order.
+    An optional aging raises the priority of the messages waiting for a long time (REPORT_STATUS is never starved),
+    up to one level below STOP : an old message never goes before a STOP.
+    """
+
+    def __init__(self, aging_period: float = None, clock=None, coalesce: bool = False):
+        """
+        Initialize an empty queue.
+
+        Args:
+            aging_period (float): Waiting time (in seconds of simulation) after which a message gains one level
+                                  of priority, up to MAX_AGED_PRIORITY. None (by default) disables the aging.
+            clock (callable): Function returning the current simulation time in seconds (needed by the aging).
+            coalesce (bool): True to replace the queued message of a coalesced type from the same sender
+                             instead of queuing a new one. False (by default) queues every message.
+        """
+        self.aging_period = aging_period if clock is not None else None
+        self.clock = clock
+
+        # priority -> FIFO of [arrival_order, arrival_time, message]
+        self.levels = {}
+        # Heap of the negated priorities present in levels (the highest priority is on top)
+        self.heap_levels = []
+
+        self.size = 0
+        self.arrival_counter = 0
+
+        self.coalesce = coalesce
+        # (id_sender, message_type) -> queued entry of the last message of a coalesced type
+        self.coalesced_entries = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        """
+        Iterate over the messages in priority order (without aging), without removing them.
+        """
+        for priority in sorted(self.levels, reverse=True):
+            for entry in self.levels[priority]:
+                yield entry[2]
+
+    def push(self, message: Message) -> bool:
+        """
+        Add a message in the queue according to its priority.
+        With the coalescing, a message of a coalesced type replaces the queued one of the same sender and type
+        (it keeps its place in the queue).
+
+        Args:
+            message (Message): The message to add.
+
+        Returns:
+            bool: True if the message replaced a queued message, False if it has been added.
+        """
+        key = None
+        if self.coalesce and MESSAGE_TYPE_PRIORITY.is_coalesced(message.message_type):
+            key = (message.id_sender, message.message_type)
+            entry = self.coalesced_entries.get(key)
+            if entry is not None and self._supersedes(message, entry[2]):
+                entry[2] = message
+                return True
+
+        priority = MESSAGE_TYPE_PRIORITY.priority(message.message_type)
+        arrival_time = self.clock() if self.aging_period is not None else 0.0
+
+        level = self.levels.get(priority)
+        if level is None:
+            level = deque()
+            self.levels[priority] = level
+            heapq.heappush(self.heap_levels, -priority)
+
+        entry = [self.arrival_counter, arrival_time, message]
+        level.append(entry)
+        self.arrival_counter += 1
+        self.size += 1
+
+        if key is not None:
+            self.coalesced_entries[key] = entry
+        return False
+
+    def peek(self) -> Message:
+        """
+        Get the next message to process without removing it.
+
+        Returns:
+            Message: The next message, None if the queue is empty.
+        """
+        level = self._next_level()
+        return level[0][2] if level is not None else None
+
+    def pop(self) -> Message:
+        """
+        Remove and return the next message to process.
+
+        Returns:
+            Message: The next message, None if the queue is empty.
+        """
+        level = self._next_level()
+        if level is None:
+            return None
+
+        self.size -= 1
+        entry = level.popleft()
+        message = entry[2]
+        if self.coalesced_entries:
+            key = (message.id_sender, message.message_type)
+            # A keyframe followed by a delta : the delta stays the entry of the sender
+            if self.coalesced_entries.get(key) is entry:
+                del self.coalesced_entries[key]
+        return message
+
+    @staticmethod
+    def _supersedes(message: Message, queued: Message) -> bool:
+        """
+        Check if a message of a coalesced type can replace the queued one of the same sender and type.
+        A position delta can't replace a keyframe : it would lose the keyframe the next deltas are relative to.
+        """
+        if MESSAGE_TYPE_PRIORITY.from_string(message.message_type) != MESSAGE_TYPE_PRIORITY.REPORT_POSITION:
+            return True
+        return message.payload.startswith(FULL_POSITION_REPORT) or not queued.payload.startswith(FULL_POSITION_REPORT)
+
+    def clear(self):
+        """
+        Remove all messages from the queue.
+        """
+        self.levels.clear()
+        self.heap_levels.clear()
+        self.size = 0
+        self.coalesced_entries.clear()
+
+    def _next_level(self):
+        """
+        Get the FIFO level holding the next message to process.
+
+        Returns:
+            deque: The level to serve, None if the queue is empty.
+        """
+        # Drop the empty levels at the top of the heap
+        while self.heap_levels and not self.levels[-self.heap_levels[0]]:
+            del self.levels[-heapq.heappop(self.heap_levels)]
+
+        if not self.heap_levels:
+            return None
+
+        if self.aging_period is None:
+            return self.levels[-self.heap_levels[0]]
+
+        # With aging, the head of each level (its oldest message) competes with its aged priority, capped below STOP
+        # (a message already above the cap keeps its priority). This scans the p levels at each peek/pop,
+        # p is small (one level per distinct priority of MESSAGE_TYPE_PRIORITY).
+        now = self.clock()
+        best_level = None
+        best_key = None
+        for priority, level in self.levels.items():
+            if level:
+                arrival_order, arrival_time, _ = level[0]
+                aged_priority = max(priority, min(priority + int((now - arrival_time) / self.aging_period),
+                                                  MAX_AGED_PRIORITY))
+                key = (aged_priority, -arrival_order)
+                if best_key is None or key > best_key:
+                    best_key = key
+                    best_level = level
+        return best_level
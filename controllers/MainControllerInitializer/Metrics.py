@@ -0,0 +1,159 @@
+"""
+File:           Metrics.py
+Date:           October 2026
+Description:    Metrics of the message pipeline of a controller : counters (messages sent, received, dropped and
+                dispatched by type, bytes on air), gauges (backlog of the queues) and histograms (waiting time of
+                the messages between their reception and their dispatch, in simulation time).
+                They are written periodically as JSON lines, one line per export :
+                    {"time": ..., "controller": ..., "counters": {...}, "gauges": {...}, "histograms": {...}}
+                The counters and histograms are cumulative, the gauges give their last and maximum value
+                since the previous export.
+                When the metrics are disabled, the controller holds None instead of a Metrics (one test per event).
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import bisect
+import json
+
+# Upper bounds (in seconds of simulation) of the buckets of the latency histograms, the last bucket is unbounded
+LATENCY_BUCKETS = (0.0, 0.032, 0.064, 0.128, 0.256, 0.512, 1.024, 2.048, 4.096)
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets, plus the count, the sum and the maximum of the observed values.
+    """
+
+    __slots__ = ("bounds", "buckets", "count", "total", "maximum")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            bounds (tuple): Sorted upper bounds (included) of the buckets, a last bucket takes the larger values.
+        """
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, value: float):
+        """
+        Add a value.
+
+        Args:
+            value (float): The value.
+        """
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def to_dict(self) -> dict:
+        """
+        Get the histogram as a dictionary (for the export).
+
+        Returns:
+            dict: The bounds, the count of each bucket, the count, the sum and the maximum of the values.
+        """
+        return {"bounds": list(self.bounds), "buckets": list(self.buckets), "count": self.count,
+                "sum": round(self.total, 6), "max": round(self.maximum, 6)}
+
+
+class Metrics:
+    """
+    Counters, gauges and histograms of a controller, exported periodically in a JSON lines file.
+    """
+
+    def __init__(self, name: str, clock, file_path: str, export_period: float):
+        """
+        Initialize the metrics (all empty).
+
+        Args:
+            name (str): Name of the controller (written in each line).
+            clock (callable): Function returning the current simulation time in seconds.
+            file_path (str): Path of the JSON lines file (the lines are appended).
+            export_period (float): Time (in seconds of simulation) between two exports.
+        """
+        self.name = name
+        self.clock = clock
+        self.file_path = file_path
+        self.export_period = export_period
+
+        # name -> value
+        self.counters = {}
+        # name -> [last value, maximum since the last export]
+        self.gauges = {}
+        # name -> Histogram
+        self.histograms = {}
+
+        self.next_export = export_period
+
+    def count(self, name: str, value: int = 1):
+        """
+        Increase a counter.
+
+        Args:
+            name (str): Name of the counter.
+            value (int): The increase (1 by default).
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float):
+        """
+        Set the current value of a gauge.
+
+        Args:
+            name (str): Name of the gauge.
+            value (float): Its current value.
+        """
+        gauge = self.gauges.get(name)
+        if gauge is None:
+            self.gauges[name] = [value, value]
+        else:
+            gauge[0] = value
+            if value > gauge[1]:
+                gauge[1] = value
+
+    def observe(self, name: str, value: float):
+        """
+        Add a value to a histogram (with the latency buckets).
+
+        Args:
+            name (str): Name of the histogram.
+            value (float): The value.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = Histogram()
+            self.histograms[name] = histogram
+        histogram.observe(value)
+
+    def export_if_due(self):
+        """
+        Export the metrics if the export period has passed since the last export.
+        """
+        now = self.clock()
+        if now >= self.next_export:
+            self.export(now)
+            self.next_export = now + self.export_period
+
+    def export(self, now: float):
+        """
+        Append the metrics as a JSON line to the file, and start a new period for the maximums of the gauges.
+
+        Args:
+            now (float): The current simulation time.
+        """
+        line = {"time": round(now, 3), "controller": self.name, "counters": self.counters,
+                "gauges": {name: {"last": gauge[0], "max": gauge[1]} for name, gauge in self.gauges.items()},
+                "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()}}
+        with open(self.file_path, "a", encoding="utf-8") as metrics_file:
+            metrics_file.write(json.dumps(line, sort_keys=True) + "\n")
+
+        for gauge in self.gauges.values():
+            gauge[1] = gauge[0]
@@ -28,25 +28,40 @@ class NetworkManagerInitialiseur:
         self.communication = CommunicationManager(self.robot)
 
         self.started = False
+        # Simulation time of the next roll call, while the main loop still misses robots
+        self.next_rollcall_time = None
 
     def update(self):
         """
         Call the roll and try to get all robots.
+        The roll is called again every rollcall_retry_period (the main loop stops calling update once all robots
+        are known) : a lost relay doesn't stall the initialization.
         """
-
-        if not self.started:
+        now = self.robot.getTime()
+        if not self.started or now >= self.next_rollcall_time:
             self.communication.send_message(Message(self.robot_name, MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL, 0, ""))
             self.robot.is_callrolling = True
             self.started = True
+            self.next_rollcall_time = now + self.robot.rollcall_retry_period
 
         # try to receive a message and add it to the robot's list
         self.communication.receive_message()
+        profiler = self.robot.profiler
+        if profiler is not None:
+            profiler.lap("radio")
 
         # Check if the list of messages is not empty
         if self.robot.list_messages:
-            # Getting the first message and remove it from the list
-            message = self.robot.list_messages[0]
-            self.robot.list_messages.pop(0)
+            # Getting the most prioritary message and remove it from the queue
+            message = self.robot.list_messages.pop()
+
+            metrics = self.robot.metrics
+            if metrics is not None:
+                metrics.count("dispatched." + message.message_type.name)
+                if message.received_time is not None:
+                    metrics.observe("latency." + message.message_type.name,
+                                    self.robot.getTime() - message.received_time)
+                metrics.gauge("message_backlog", len(self.robot.list_messages))
 
             id_sender = message.id_sender
             message_type = MESSAGE_TYPE_PRIORITY.from_string(message.message_type)
@@ -58,7 +73,10 @@ class NetworkManagerInitialiseur:
                     self.case_REPORT_BEGIN_ROLLCALL(id_sender, payload)
 
                 case _:
-                    print("Unknown message received")
+                    self.robot.logger.debug("network", "Unknown message received : %s", message)
+
+        if profiler is not None:
+            profiler.lap("dispatch")
 
     def case_REPORT_BEGIN_ROLLCALL(self, id_sender, payload):
         """
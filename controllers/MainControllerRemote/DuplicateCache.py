@@ -0,0 +1,76 @@
+"""
+File:           DuplicateCache.py
+Date:           October 2026
+Description:    Bounded cache of the message ids already seen (LRU with a time to live in simulation time).
+                Used to drop the copies of a flooded message and to relay each flooded message only once.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+from collections import OrderedDict
+
+
+class DuplicateCache:
+    """
+    Bounded cache of the message ids already seen.
+    An id is forgotten when it hasn't been seen for ttl seconds, or when the cache is full (least recently seen first).
+    """
+
+    def __init__(self, clock, capacity: int = 256, ttl: float = 10.0):
+        """
+        Initialize an empty cache.
+
+        Args:
+            clock (callable): Function returning the current simulation time in seconds.
+            capacity (int): Maximum number of ids kept.
+            ttl (float): Time (in seconds of simulation) after which an id which hasn't been seen is forgotten.
+        """
+        self.clock = clock
+        self.capacity = capacity
+        self.ttl = ttl
+
+        # id -> last time it has been seen, the least recently seen first
+        self.last_seen = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.last_seen)
+
+    def check(self, key) -> bool:
+        """
+        Check if an id has already been seen, and remember it.
+
+        Args:
+            key (hashable): The id of the message.
+
+        Returns:
+            bool: True if the id has already been seen (the message is a duplicate), False otherwise.
+        """
+        now = self.clock()
+        self.expire(now)
+
+        is_duplicate = key in self.last_seen
+        self.last_seen[key] = now
+        if is_duplicate:
+            self.last_seen.move_to_end(key)
+        elif len(self.last_seen) > self.capacity:
+            self.last_seen.popitem(last=False)
+        return is_duplicate
+
+    def expire(self, now: float):
+        """
+        Forget the ids which haven't been seen for ttl seconds.
+
+        Args:
+            now (float): The current simulation time.
+        """
+        while self.last_seen:
+            key, last_seen = next(iter(self.last_seen.items()))
+            if now - last_seen < self.ttl:
+                break
+            del self.last_seen[key]
+
+    def clear(self):
+        """
+        Forget all ids.
+        """
+        self.last_seen.clear()
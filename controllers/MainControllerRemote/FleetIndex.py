@@ -0,0 +1,120 @@
+"""
+File:           FleetIndex.py
+Date:           October 2026
+Description:    Dictionary of the known robots and their status (known_robots), indexed on each status change.
+                It keeps the names in alphabetical order, with the robots in range and the free ones apart,
+                so the previous/next robot in range and the first free robot are found in O(log n).
+                Its version is increased on each change (new robot, status change, removal), to tell cheaply
+                if the fleet changed since a given time.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from MESSAGE_TYPE_PRIORITY import *
+
+_OUT_RANGE = str(MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE)
+_FREE = str(MESSAGE_TYPE_PRIORITY.STATUS_FREE)
+
+
+class FleetIndex(dict):
+    """
+    Dictionary name -> status of the known robots, indexed on each status change.
+    A status can be a MESSAGE_TYPE_PRIORITY or its string (with coordinates for STATUS_GOTOCOORDINATES).
+    """
+
+    def __init__(self, statuses: dict = None):
+        """
+        Initialize the index.
+
+        Args:
+            statuses (dict): Initial statuses of the robots (name -> status).
+        """
+        super().__init__()
+
+        # names in alphabetical order : all robots, robots in range, free robots
+        self.names = []
+        self.in_range = []
+        self.free = []
+
+        # Increased on each change of the index (setting the same status again isn't a change)
+        self.version = 0
+
+        if statuses:
+            for name, status in statuses.items():
+                self[name] = status
+
+    def __setitem__(self, name: str, status):
+        if name in self:
+            previous = dict.__getitem__(self, name)
+            if str(previous) == str(status):
+                dict.__setitem__(self, name, status)
+                return
+            self._unindex(name, previous)
+        else:
+            insort(self.names, name)
+        dict.__setitem__(self, name, status)
+        self._index(name, status)
+        self.version += 1
+
+    def __delitem__(self, name: str):
+        self._unindex(name, dict.__getitem__(self, name))
+        self.names.pop(bisect_left(self.names, name))
+        dict.__delitem__(self, name)
+        self.version += 1
+
+    def clear(self):
+        dict.clear(self)
+        self.version += 1
+        self.names.clear()
+        self.in_range.clear()
+        self.free.clear()
+
+    def previous_in_range(self, name: str):
+        """
+        Get the robot just before a name, in alphabetical order, ignoring the OUT_RANGE robots.
+
+        Args:
+            name (str): The name of reference (usually mine).
+
+        Returns:
+            str: The name of the previous robot in range, None if there is none.
+        """
+        index = bisect_left(self.in_range, name)
+        return self.in_range[index - 1] if index > 0 else None
+
+    def next_in_range(self, name: str):
+        """
+        Get the robot just after a name, in alphabetical order, ignoring the OUT_RANGE robots.
+
+        Args:
+            name (str): The name of reference (usually mine).
+
+        Returns:
+            str: The name of the next robot in range, None if there is none.
+        """
+        index = bisect_right(self.in_range, name)
+        return self.in_range[index] if index < len(self.in_range) else None
+
+    def first_free(self):
+        """
+        Get the first free robot in alphabetical order.
+
+        Returns:
+            str: The name of the first free robot, None if no robot is free.
+        """
+        return self.free[0] if self.free else None
+
+    def _index(self, name: str, status):
+        status = str(status)
+        if status != _OUT_RANGE:
+            insort(self.in_range, name)
+        if status == _FREE:
+            insort(self.free, name)
+
+    def _unindex(self, name: str, status):
+        status = str(status)
+        if status != _OUT_RANGE:
+            self.in_range.pop(bisect_left(self.in_range, name))
+        if status == _FREE:
+            self.free.pop(bisect_left(self.free, name))
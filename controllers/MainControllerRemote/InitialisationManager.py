@@ -11,18 +11,13 @@ from RobotUpRemote import *
 
 def init_devices(remote: RobotUpRemote):
     """
-    Enable all devices of the remote with a simulation time_step of 10 (ms).
-    time_step value can be modified.
+    Apply the sampling profile of the remote (see sampling_profile in RobotUpRemote) :
+    only the devices used by the controller are enabled, each one at its own period, at its first access.
+    The devices which aren't in the profile (unused sensors) stay disabled.
 
     Args:
         remote (RobotUpRemote): The remote to initialize
     """
-    time_step = 10
-
-    # Loop through each device and attempt to enable it if the enable method exists
-    for device_name in remote.remote.devices:
-        device = remote.remote.devices[device_name]
-        if hasattr(device, 'enable') and callable(getattr(device, 'enable')):
-            device.enable(time_step)
+    remote.set_sampling_profile(remote.sampling_profile)
 
     print(remote.getName(), " has been enabled")
@@ -0,0 +1,208 @@
+"""
+File:           Logger.py
+Date:           October 2026
+Description:    Levelled logging of a controller, cheap enough to stay on during the simulation.
+                A record is only formatted when it is printed, written or dumped (lazy formatting).
+                The kept records go to a ring buffer (the last ones, dumped on demand or on crash),
+                the console only prints the important ones, and the log file is written by a background thread.
+                Each category (radio, task ...) can have its own level, and the high-rate ones can be sampled.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import atexit
+import queue
+import sys
+import threading
+from collections import deque
+
+# Levels of the records
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+# Level of a disabled category (or output)
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+
+class Logger:
+    """
+    Levelled logger of a controller, with categories, a ring buffer of the last records,
+    the console for the important records and a log file written in background.
+    """
+
+    def __init__(self, name: str, clock, level: int = DEBUG, console_level: int = INFO, file_path: str = None,
+                 file_level: int = DEBUG, ring_size: int = 1000):
+        """
+        Initialize the logger.
+
+        Args:
+            name (str): Name of the controller (written in each record).
+            clock (callable): Function returning the current simulation time in seconds.
+            level (int): Minimum level of the kept records (ring buffer, console and file).
+            console_level (int): Minimum level of the records printed on the console.
+            file_path (str): Path of the log file, None for no file.
+            file_level (int): Minimum level of the records written in the log file.
+            ring_size (int): Number of last records kept in the ring buffer.
+        """
+        self.name = name
+        self.clock = clock
+        self.level = level
+        self.console_level = console_level
+        self.file_level = file_level if file_path else OFF
+
+        # category -> minimum level of the category (the level of the logger if not set)
+        self.categories = {}
+        # category -> [keep one record out of every, records seen]
+        self.sampling = {}
+
+        # Last records : (time, level, category, message, args), formatted only when dumped
+        self.ring = deque(maxlen=ring_size)
+
+        # Background writer of the log file
+        self.file_queue = None
+        self.writer = None
+        if file_path:
+            self.file_queue = queue.SimpleQueue()
+            self.writer = threading.Thread(target=self._write_file, args=(file_path,), daemon=True)
+            self.writer.start()
+            atexit.register(self.close)
+
+    def set_category(self, category: str, level: int):
+        """
+        Set the minimum level of a category (OFF disables it).
+
+        Args:
+            category (str): The category.
+            level (int): The minimum level.
+        """
+        self.categories[category] = level
+
+    def set_sampling(self, category: str, every: int):
+        """
+        Keep only one record out of every records of a category (for the high-rate events).
+
+        Args:
+            category (str): The category.
+            every (int): Keep one record out of every. 1 keeps all records.
+        """
+        if every <= 1:
+            self.sampling.pop(category, None)
+        else:
+            self.sampling[category] = [every, 0]
+
+    def is_enabled(self, level: int, category: str) -> bool:
+        """
+        Check if a record of a level and a category would be kept (to avoid building costly arguments).
+
+        Args:
+            level (int): The level of the record.
+            category (str): The category of the record.
+
+        Returns:
+            bool: True if the record would be kept.
+        """
+        return level >= self.categories.get(category, self.level)
+
+    def log(self, level: int, category: str, message: str, *args):
+        """
+        Keep a record. The message is formatted with the args (message % args) only when it is output.
+
+        Args:
+            level (int): The level of the record.
+            category (str): The category of the record.
+            message (str): The message, with %s for the args.
+            *args: The args of the message.
+        """
+        if level < self.categories.get(category, self.level):
+            return
+
+        sampling = self.sampling.get(category)
+        if sampling is not None:
+            sampling[1] += 1
+            if sampling[1] % sampling[0] != 1:
+                return
+
+        record = (self.clock(), level, category, message, args)
+        self.ring.append(record)
+
+        if level >= self.console_level:
+            print(self.format(record))
+        if level >= self.file_level:
+            self.file_queue.put(record)
+
+    def debug(self, category: str, message: str, *args):
+        self.log(DEBUG, category, message, *args)
+
+    def info(self, category: str, message: str, *args):
+        self.log(INFO, category, message, *args)
+
+    def warning(self, category: str, message: str, *args):
+        self.log(WARNING, category, message, *args)
+
+    def error(self, category: str, message: str, *args):
+        self.log(ERROR, category, message, *args)
+
+    def format(self, record) -> str:
+        """
+        Format a record : "time name LEVEL [category] message".
+
+        Args:
+            record (tuple): The record.
+
+        Returns:
+            str: The formatted record.
+        """
+        time, level, category, message, args = record
+        if args:
+            message = message % args
+        return "{:9.3f} {} {} [{}] {}".format(time, self.name, LEVEL_NAMES.get(level, level), category, message)
+
+    def dump(self, stream=None):
+        """
+        Write the records of the ring buffer (the last ones).
+
+        Args:
+            stream (TextIO): Where to write them, the console (stdout) by default.
+        """
+        stream = stream or sys.stdout
+        stream.write("---------------------------- LAST RECORDS OF {} ----------------------------\n".format(self.name))
+        for record in list(self.ring):
+            stream.write(self.format(record) + "\n")
+        stream.flush()
+
+    def install_crash_dump(self):
+        """
+        Dump the ring buffer on the console (stderr) if the controller crashes (uncaught exception).
+        """
+        previous_hook = sys.excepthook
+
+        def crash_hook(exception_type, exception, traceback):
+            self.dump(sys.stderr)
+            previous_hook(exception_type, exception, traceback)
+
+        sys.excepthook = crash_hook
+
+    def close(self):
+        """
+        Write the remaining records in the log file and stop the background writer.
+        """
+        if self.writer is not None and self.writer.is_alive():
+            self.file_queue.put(None)
+            self.writer.join(timeout=2.0)
+
+    def _write_file(self, file_path: str):
+        """
+        Background writer : format and write the records of the file queue until None is received.
+        """
+        with open(file_path, "a", encoding="utf-8") as log_file:
+            while True:
+                record = self.file_queue.get()
+                if record is None:
+                    break
+                log_file.write(self.format(record) + "\n")
+                # Write by batches : flush when the queue is empty
+                if self.file_queue.empty():
+                    log_file.flush()
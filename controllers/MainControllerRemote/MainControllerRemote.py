@@ -21,6 +21,9 @@ time_step = robot.getBasicTimeStep()
 init_devices(robot)
 
 network_manager = NetworkManagerRemote(robot)
+
+# Profiling of the ticks (phases, real-time factor, stack sampler), enabled by the environment variable ROBOT_PROFILE
+robot.profiler = Profiler.from_environment(robot.getName(), robot.getTime, robot.logger)
 # ---------------------------------
 
 # Main loop of simulation
@@ -11,6 +11,11 @@ Description:    Structure of a message used by robot and remote to communicate.
                 send_counter (int): Number of times the message has been transmitted.
                 payload = content of the message ("" by default) (string)
                 recipient = recipient of the message (webots's name). It can be empty ("" by default)(string)
+                            or a group of recipients (collection of names)
+                origin, sequence = unique id of the logical message : name of the robot which created it
+                                   and its sequence number. Kept when the message is relayed.
+                reliable_sequence = sequence number of a reliable unicast message for its recipient
+                                    (None for a best effort message, see ReliableChannel)
 Author:         Nordine HIDA
 Modifications:
 """
@@ -30,9 +35,12 @@ class Message:
     send_counter (int): Number of times the message has been transmitted.
     payload = content of the message ("" by default) (string)
     recipient = recipient of the message (webots's name). It can be empty ("" by default)(string)
+    origin, sequence = unique id of the logical message (set when it is sent, kept when it is relayed)
+    reliable_sequence = sequence number of a reliable message for its recipient (None if best effort)
     """
 
-    def __init__(self, id_sender: str, message_type: MESSAGE_TYPE_PRIORITY, send_counter: int, payload: str = "", recipient: str = ""):
+    def __init__(self, id_sender: str, message_type: MESSAGE_TYPE_PRIORITY, send_counter: int, payload: str = "", recipient: str = "",
+                 origin: str = None, sequence: int = None, reliable_sequence: int = None):
         """
         Initialize the Message object with provided sender ID, message type, and payload, and maybe a recipient.
 
@@ -41,10 +49,30 @@ class Message:
             message_type (MESSAGE_TYPE_PRIORITY): Message type from the enumeration MESSAGE_TYPE_PRIORITY.
             payload (str): content of the message ("" by default).
             send_counter (int): Number of times the message has been transmitted.
-            recipient (str): recipient of the message (webots's name). It can be empty ("" by default).
+            recipient (str): recipient of the message (webots's name). It can be empty ("" by default),
+                             or be a collection of names for a group of recipients.
+            origin (str): Name of the robot which created the message. None (by default) for a new message,
+                          the sender becomes its origin when it is sent.
+            sequence (int): Sequence number of the message at its origin. None (by default) for a new message.
+            reliable_sequence (int): Sequence number of a reliable message for its recipient. None (by default)
+                                     for a best effort message, set by the reliable channel when it is sent.
         """
         self.id_sender = id_sender
         self.message_type = message_type
         self.send_counter = send_counter
         self.payload = payload
         self.recipient = recipient
+        self.origin = origin
+        self.sequence = sequence
+        self.reliable_sequence = reliable_sequence
+        # Simulation time of the reception of the message (only set when the metrics are enabled)
+        self.received_time = None
+
+    def __str__(self) -> str:
+        """
+        Readable form of the message (for debugging purposes)
+        id_sender;message_type;send_counter;payload;recipient
+        """
+        message_type = str(self.message_type).replace("MESSAGE_TYPE_PRIORITY.", "")
+        recipient = self.recipient if isinstance(self.recipient, str) else ",".join(sorted(self.recipient))
+        return "{};{};{};{};{}".format(self.id_sender, message_type, self.send_counter, self.payload, recipient)
@@ -0,0 +1,89 @@
+"""
+File:           NeighborTable.py
+Date:           October 2026
+Description:    Table of the neighbors and the last time (simulation time) we heard from them.
+                The expiry deadlines are kept in a min-heap, so each update only looks at the neighbors
+                whose deadline has passed instead of the whole fleet.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import heapq
+
+
+class NeighborTable:
+    """
+    Table of the neighbors and the last time (simulation time) we heard from them.
+    A neighbor expires when we haven't heard from it for expiry seconds.
+    """
+
+    def __init__(self, expiry: float):
+        """
+        Initialize an empty table.
+
+        Args:
+            expiry (float): Time (in seconds of simulation) without news after which a neighbor expires.
+        """
+        self.expiry = expiry
+
+        # name -> last time we heard from it
+        self.last_seen = {}
+        # min-heap of (deadline, name), one entry per neighbor not expired yet.
+        # A deadline can be older than last_seen + expiry, it is pushed back when it is reached.
+        self.deadlines = []
+        # neighbors with an entry in deadlines
+        self.armed = set()
+
+    def __len__(self) -> int:
+        return len(self.last_seen)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.last_seen
+
+    def reset(self, names, now: float):
+        """
+        Replace the table by the given neighbors, heard now.
+
+        Args:
+            names (Iterable[str]): Names of the neighbors.
+            now (float): The current simulation time.
+        """
+        self.last_seen = {name: now for name in names}
+        self.deadlines = [(now + self.expiry, name) for name in self.last_seen]
+        heapq.heapify(self.deadlines)
+        self.armed = set(self.last_seen)
+
+    def touch(self, name: str, now: float):
+        """
+        Remember that we just heard from a neighbor.
+
+        Args:
+            name (str): Name of the neighbor.
+            now (float): The current simulation time.
+        """
+        self.last_seen[name] = now
+        if name not in self.armed:
+            heapq.heappush(self.deadlines, (now + self.expiry, name))
+            self.armed.add(name)
+
+    def expire(self, now: float) -> list:
+        """
+        Get the neighbors which have just expired (each one is returned once, until we hear from it again).
+
+        Args:
+            now (float): The current simulation time.
+
+        Returns:
+            list: Names of the neighbors which have just expired.
+        """
+        expired = []
+        while self.deadlines and self.deadlines[0][0] <= now:
+            _, name = heapq.heappop(self.deadlines)
+            deadline = self.last_seen[name] + self.expiry
+            if deadline <= now:
+                self.armed.discard(name)
+                expired.append(name)
+            else:
+                # We heard from it since the deadline was set
+                heapq.heappush(self.deadlines, (deadline, name))
+        return expired
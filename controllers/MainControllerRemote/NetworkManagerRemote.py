@@ -6,6 +6,7 @@ Author:         Nordine HIDA
 Modifications:
 """
 
+import time
 from CommunicationManager import *
 
 
@@ -33,11 +34,25 @@ class NetworkManagerRemote:
 
         self.timer_reset_neighbor = 150
 
+        # Budget of an update : maximum number of messages handled (CAN BE MODIFIED)
+        self.dispatch_max_messages = 10
+        # Budget of an update : maximum CPU time (in ms) spent handling messages (CAN BE MODIFIED)
+        self.dispatch_max_time = 5.0
+
+        # Statistics of the dispatch, to tune the budget
+        # number of messages still waiting after the last update, and the highest value seen
+        self.backlog = 0
+        self.max_backlog = 0
+        # number of handled messages, and number of updates that ended with their budget exhausted
+        self.dispatched_count = 0
+        self.budget_exhausted_count = 0
+
     def update(self):
         """
-        Check if there is message or a pressed key and handle it.
+        Check if there is a pressed key and handle it,
+        then handle the received messages by priority order, within the budget of the update.
         """
-        neighbors_updated = False
+        senders = set()
 
         # Check if a key is pressed
         key = self.keyboard.getKey()
@@ -47,20 +62,18 @@ class NetworkManagerRemote:
             # END -> STOP
             if key == Keyboard.END:
                 self.communication.send_message_all(self.robot_name, MESSAGE_TYPE_PRIORITY.STOP, 0)
+                # The robots forget their coordinates
+                self.remote.allocator.forget()
 
             # Arrow keys -> GO_TO_COORDINATES with different coordinates
             elif key == Keyboard.RIGHT:
-                self.communication.send_message(
-                    Message(self.robot_name, MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES, 0, "1:1", self.remote.first_rob))
+                self.send_coordinates([(1, 1)])
             elif key == Keyboard.UP:
-                self.communication.send_message(
-                    Message(self.robot_name, MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES, 0, "1:-1", self.remote.first_rob))
+                self.send_coordinates([(1, -1)])
             elif key == Keyboard.LEFT:
-                self.communication.send_message(
-                    Message(self.robot_name, MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES, 0, "-1:1", self.remote.first_rob))
+                self.send_coordinates([(-1, 1)])
             elif key == Keyboard.DOWN:
-                self.communication.send_message(
-                    Message(self.robot_name, MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES, 0, "-1:-1", self.remote.first_rob))
+                self.send_coordinates([(-1, -1)])
 
             # Page down -> Path which form a circle around (0;0)
             elif key == Keyboard.PAGEDOWN:
@@ -76,6 +89,7 @@ class NetworkManagerRemote:
                 # Number of points to generate
                 num_points = 10
 
+                circle = []
                 for i in range(num_points):
                     # Calculate angle for each point
                     angle = 2 * math.pi * i / num_points
@@ -83,107 +97,249 @@ class NetworkManagerRemote:
                     # Calculate coordinates for each point
                     x = round(center_x + radius * math.cos(angle), 3)
                     y = round(center_y + radius * math.sin(angle), 3)
+                    circle.append((x, y))
 
-                    # Sending message to go to coordinates
-                    message = Message(self.robot_name, MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES, 0, f"{x}:{y}", self.remote.first_rob)
-                    self.communication.send_message(message)
+                # Sending messages to go to coordinates
+                self.send_coordinates(circle)
 
             else:
                 # Help menu with all commands and their key
                 self.print_help_commands()
 
-        # try to receive a message and add it to the remote's list
+        profiler = self.remote.profiler
+        if profiler is not None:
+            profiler.lap("keyboard")
+
+        # try to receive a message and add it to the remote's queue
         self.communication.receive_message()
+        if profiler is not None:
+            profiler.lap("radio")
+
+        # Handle the messages while there are some and the budget isn't exhausted
+        deadline = time.process_time() + self.dispatch_max_time / 1000
+        handled = 0
+        metrics = self.remote.metrics
+        while self.remote.list_messages:
+            if handled >= self.dispatch_max_messages or time.process_time() > deadline:
+                self.budget_exhausted_count += 1
+                if metrics is not None:
+                    metrics.count("budget_exhausted")
+                break
+
+            # Getting the most prioritary message and remove it from the queue
+            message = self.remote.list_messages.pop()
+            if metrics is not None:
+                self.observe_dispatch(metrics, message)
+            self.dispatch(message)
+            handled += 1
 
-        # Check if the list of messages is not empty
-        if self.remote.list_messages:
-            # Getting the first message and remove it from the list
-            message = self.remote.list_messages[0]
-            self.remote.list_messages.pop(0)
+            if self.remote.is_initialized:
+                senders.add(message.id_sender)
 
-            id_sender = message.id_sender
-            message_type = MESSAGE_TYPE_PRIORITY.from_string(str(message.message_type))
-            payload = message.payload
+        self.dispatched_count += handled
+        self.backlog = len(self.remote.list_messages)
+        self.max_backlog = max(self.max_backlog, self.backlog)
+        if metrics is not None:
+            metrics.gauge("message_backlog", self.backlog)
+        if profiler is not None:
+            profiler.lap("dispatch")
 
-            match message_type:
-                case MESSAGE_TYPE_PRIORITY.REPORT_STATUS:
-                    self.case_REPORT_STATUS(id_sender, payload)
+        if self.remote.is_initialized:
+            self.update_first_rob()
+            self.update_neighbors_last_com(senders)
+            if profiler is not None:
+                profiler.lap("neighbors")
 
-                case MESSAGE_TYPE_PRIORITY.STATUS_CURRENT_TASK:
-                    self.case_STATUS_CURRENT_TASK(id_sender,payload)
+    def observe_dispatch(self, metrics: Metrics, message: Message):
+        """
+        Count a dispatched message and its waiting time in the queue (since its reception, in simulation time).
 
-                case MESSAGE_TYPE_PRIORITY.REPORT_POSITION:
-                    self.case_REPORT_POSITION(id_sender, payload)
+        Args:
+            metrics (Metrics): The metrics of the remote.
+            message (Message): The message taken from the queue.
+        """
+        message_type = message.message_type.name
+        metrics.count("dispatched." + message_type)
+        if message.received_time is not None:
+            metrics.observe("latency." + message_type, self.remote.getTime() - message.received_time)
 
-                case MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES:
-                    self.case_STATUS_GOTOCOORDINATES(id_sender)
+    def dispatch(self, message: Message):
+        """
+        Handle a message according to its type.
 
-                case MESSAGE_TYPE_PRIORITY.STATUS_FREE:
-                    self.case_STATUS_FREE(id_sender)
+        Args:
+            message (Message): The message to handle.
+        """
+        id_sender = message.id_sender
+        message_type = MESSAGE_TYPE_PRIORITY.from_string(str(message.message_type))
+        payload = message.payload
 
-                case MESSAGE_TYPE_PRIORITY.STOP:
-                    self.case_STOP()
+        match message_type:
+            case MESSAGE_TYPE_PRIORITY.REPORT_STATUS:
+                self.case_REPORT_STATUS(id_sender, payload)
 
-                case MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES:
-                    self.case_GO_TO_COORDINATES(id_sender, payload)
+            case MESSAGE_TYPE_PRIORITY.STATUS_CURRENT_TASK:
+                self.case_STATUS_CURRENT_TASK(id_sender,payload)
 
-                case MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL:
-                    self.case_REPORT_BEGIN_ROLLCALL(id_sender, payload)
+            case MESSAGE_TYPE_PRIORITY.REPORT_POSITION:
+                self.case_REPORT_POSITION(id_sender, payload)
 
-                case MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE:
-                    self.case_STATUS_OUT_RANGE(payload)
+            case MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES:
+                self.case_STATUS_GOTOCOORDINATES(id_sender)
 
-                case _:
-                    print("Unknown message received")
+            case MESSAGE_TYPE_PRIORITY.STATUS_FREE:
+                self.case_STATUS_FREE(id_sender, payload)
 
-            if self.remote.is_initialized:
-                self.update_neighbors_last_com(id_sender)
-                neighbors_updated = True
+            case MESSAGE_TYPE_PRIORITY.STOP:
+                self.case_STOP()
 
-        if self.remote.is_initialized:
-            self.update_first_rob()
-            if not neighbors_updated:
-                self.update_neighbors_last_com()
+            case MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES:
+                self.case_GO_TO_COORDINATES(id_sender, payload)
 
-    def update_neighbors_last_com(self, id_sender: str = None):
+            case MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL:
+                self.case_REPORT_BEGIN_ROLLCALL(id_sender, payload)
+
+            case MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE:
+                self.case_STATUS_OUT_RANGE(payload)
+
+            case _:
+                self.remote.logger.warning("network", "Unknown message received : %s", message)
+
+    def send_coordinates(self, coordinates: list):
         """
-        Update the last communication time for neighboring robots.
+        Send a batch of coordinates to the robots.
+        If allocate_tasks is set, the allocator gives each coordinates to the robot which will reach them the soonest
+        (the free robots, or the robots in range if none is free, with a known position), by minimum total cost.
+        Otherwise, or if there is no robot to choose, all coordinates are sent to first_rob, which passes the next
+        ones along the fleet (circuit formation, see the STATUS_FREE hand-off of the robots).
 
         Args:
-            id_sender (str): The ID of the sender robot.
+            coordinates (list): The (x, y) coordinates to send.
         """
-        # Reset the last communication time for the sender robot
-        if id_sender:
-            self.remote.neighbors_last_com[id_sender] = 0
+        robots = []
+        if self.remote.allocate_tasks:
+            robots = list(self.remote.known_robots.free) or list(self.remote.known_robots.in_range)
 
-        # Increment the last communication time for all neighbors
-        # and mark the robot as OUT OF RANGE if it hasn't communicated for 75 times (75 update loop)
-        for neighbor_id, last_com_time in self.remote.neighbors_last_com.items():
-            if id_sender is None or id_sender != neighbor_id:
-                self.remote.neighbors_last_com[neighbor_id] += 1
-                if last_com_time > 75:
-                    self.remote.known_robots[neighbor_id] = MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE
+        waypoints = [Coordinates(x, y) for x, y in coordinates]
+        if len(robots) > self.remote.max_allocation_candidates:
+            robots = self.closest_candidates(waypoints, robots) or robots
 
-    def update_first_rob(self):
+        assignments = [(robot, waypoint.x, waypoint.y)
+                       for robot, waypoint in self.remote.allocator.allocate(waypoints, robots, self.remote.getTime())]
+        if not assignments:
+            assignments = [(self.remote.first_rob, x, y) for x, y in coordinates]
+
+        for recipient, x, y in assignments:
+            self.communication.send_message(
+                Message(self.robot_name, MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES, 0, f"{x}:{y}", recipient))
+
+    def closest_candidates(self, waypoints: list, robots: list) -> list:
         """
-        Update first_rob by retrieving the first robot in alphabetical order
-        with value "STATUS_FREE". If none found, set to None.
+        Keep, among robots, the allocation_neighbors closest robots of each coordinates (with a reported position).
+
+        Args:
+            waypoints (list): The coordinates to allocate.
+            robots (list): Names of the robots that can receive coordinates.
+
+        Returns:
+            list: Names of the candidate robots, in alphabetical order.
         """
-        # Get the keys of known_robots sorted alphabetically
-        sorted_keys = sorted(self.remote.known_robots.keys())
+        allowed = set(robots)
+        candidates = set()
+        for waypoint in waypoints:
+            for _, name in self.remote.spatial_index.nearest(waypoint.x, waypoint.y, self.remote.allocation_neighbors,
+                                                             allowed.__contains__):
+                candidates.add(name)
+        return sorted(candidates)
+
+    def closest_robots(self, x: float, y: float, k: int = 1, status: MESSAGE_TYPE_PRIORITY = None) -> list:
+        """
+        Get the k robots the closest to a point (according to their reported position).
 
-        # Set initial value of first_rob to ""
-        self.remote.first_rob = ""
+        Args:
+            x (float): X coordinate of the point.
+            y (float): Y coordinate of the point.
+            k (int): Number of robots wanted.
+            status (MESSAGE_TYPE_PRIORITY): Only the robots with this status (STATUS_FREE ...), None for all robots.
 
-        # Iterate through the sorted keys
-        i = 0
-        while i < len(sorted_keys) and self.remote.first_rob == "":
-            key = sorted_keys[i]
-            # Check if the value of the key is "STATUS_FREE"
-            if self.remote.known_robots[key] == str(MESSAGE_TYPE_PRIORITY.STATUS_FREE):
-                # Update first_rob with the robot's name
-                self.remote.first_rob = key
-            i += 1
+        Returns:
+            list: Names of the closest robots, the closest first.
+        """
+        return [name for _, name in self.remote.spatial_index.nearest(x, y, k, self.status_filter(status))]
+
+    def robots_within(self, x: float, y: float, radius: float, status: MESSAGE_TYPE_PRIORITY = None) -> list:
+        """
+        Get the robots within a distance of a point (according to their reported position).
+
+        Args:
+            x (float): X coordinate of the point.
+            y (float): Y coordinate of the point.
+            radius (float): The distance (in meters).
+            status (MESSAGE_TYPE_PRIORITY): Only the robots with this status (STATUS_FREE ...), None for all robots.
+
+        Returns:
+            list: Names of the robots within the distance, the closest first.
+        """
+        return [name for _, name in self.remote.spatial_index.within(x, y, radius, self.status_filter(status))]
+
+    def status_filter(self, status: MESSAGE_TYPE_PRIORITY):
+        """
+        Get the function telling if a robot has a status (the coordinates of a status are ignored).
+
+        Args:
+            status (MESSAGE_TYPE_PRIORITY): The status, None to accept all robots.
+
+        Returns:
+            callable: The function taking the name of a robot, None if all robots are accepted.
+        """
+        if status is None:
+            return None
+        prefix = str(status)
+        return lambda name: str(self.remote.known_robots.get(name, "")).split(":")[0] == prefix
+
+    def observe_coordinates(self, id_sender: str, payload):
+        """
+        Give the allocator the position of a robot from a status ending by coordinates
+        ("...STATUS_GOTOCOORDINATES:x:y" where it is going, "GO_TO_COORDINATES:x:y" where it stopped).
+
+        Args:
+            id_sender (str): The ID of the robot.
+            payload (str): The status of the robot.
+        """
+        fields = str(payload).split(":")
+        if len(fields) == 3:
+            try:
+                self.remote.allocator.observe_position(id_sender, float(fields[1]), float(fields[2]))
+            except ValueError:
+                pass
+
+    def update_neighbors_last_com(self, id_senders: set = frozenset()):
+        """
+        Update the last communication time for neighboring robots,
+        and mark as OUT OF RANGE the ones that haven't communicated for neighbor_expiry seconds.
+        Only the robots whose deadline has passed are looked at. Only the known robots are neighbors
+        (not the remote nor the initializer).
+
+        Args:
+            id_senders (set): The IDs of the robots that sent the messages handled during this update.
+        """
+        now = self.remote.getTime()
+
+        known_robots = self.remote.known_robots
+        if known_robots is not None:
+            for id_sender in id_senders:
+                if id_sender in known_robots:
+                    self.remote.neighbors.touch(id_sender, now)
+
+        for neighbor_id in self.remote.neighbors.expire(now):
+            self.remote.known_robots[neighbor_id] = MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE
+
+    def update_first_rob(self):
+        """
+        Update first_rob by retrieving the first robot in alphabetical order
+        with value "STATUS_FREE" (kept by the FleetIndex known_robots). If none found, set to "".
+        """
+        self.remote.first_rob = self.remote.known_robots.first_free() or ""
 
     def case_REPORT_STATUS(self, id_sender, payload):
         # TODO: Implement handling of REPORT_STATUS message
@@ -194,16 +350,24 @@ class NetworkManagerRemote:
         Add the sender as a neighbor with it current task
         """
         self.remote.known_robots[id_sender] = payload
+        self.observe_coordinates(id_sender, payload)
 
     def case_REPORT_POSITION(self, id_sender, payload):
-        # TODO: Implement handling of REPORT_POSITION message
-        pass
+        """
+        Update the position table of the fleet with the position reported by a robot, and give it to the allocator.
+        """
+        position = self.remote.fleet_positions.update(id_sender, payload, self.remote.getTime())
+        if position is not None:
+            self.remote.spatial_index.update(id_sender, position.x, position.y)
+            self.remote.allocator.observe_position(id_sender, position.x, position.y)
 
     def case_STATUS_GOTOCOORDINATES(self, id_sender):
         self.remote.known_robots[id_sender] = MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES
 
-    def case_STATUS_FREE(self, id_sender):
+    def case_STATUS_FREE(self, id_sender, payload):
         self.remote.known_robots[id_sender] = MESSAGE_TYPE_PRIORITY.STATUS_FREE
+        # The robot tells where it stopped
+        self.observe_coordinates(id_sender, payload)
 
     def case_STOP(self):
         # TODO: Implement handling of STOP message
@@ -224,8 +388,8 @@ class NetworkManagerRemote:
             payload (str): The payload of the message composed of all remote's name concatenated and separated by a ':'.
         """
         all_known_robots = payload.split(":")
-        self.remote.known_robots = {name: MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE for name in all_known_robots}
-        self.remote.neighbors_last_com = {name: 0 for name in all_known_robots}
+        self.remote.known_robots = FleetIndex({name: MESSAGE_TYPE_PRIORITY.STATUS_OUT_RANGE for name in all_known_robots})
+        self.remote.neighbors.reset(all_known_robots, self.remote.getTime())
         self.remote.is_initialized = True
 
     @staticmethod
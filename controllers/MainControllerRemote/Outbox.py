@@ -0,0 +1,62 @@
+"""
+File:           Outbox.py
+Date:           October 2026
+Description:    Packets waiting to be emitted. Messages sent during a tick are collected here
+                and leave together at the next simulation step, instead of spending a step per packet.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+from collections import deque
+
+
+class Outbox:
+    """
+    Packets waiting to be emitted, flushed once per simulation step.
+    A budget limits the number of packets emitted per step, the remaining ones are carried over to the next step.
+    """
+
+    def __init__(self, emitter, packets_per_tick: int = None):
+        """
+        Initialize an empty outbox.
+
+        Args:
+            emitter (Emitter): The emitter used to send the packets.
+            packets_per_tick (int): Maximum number of packets emitted per step. None (by default) is unlimited.
+        """
+        self.emitter = emitter
+        self.packets_per_tick = packets_per_tick
+        self.packets = deque()
+
+    def __len__(self) -> int:
+        return len(self.packets)
+
+    def push(self, packet: bytes):
+        """
+        Add a packet to emit at the next step.
+
+        Args:
+            packet (bytes): The encoded message.
+        """
+        self.packets.append(packet)
+
+    def flush(self) -> int:
+        """
+        Emit the waiting packets, within the budget of the step.
+
+        Returns:
+            int: The number of emitted packets.
+        """
+        count = len(self.packets)
+        if self.packets_per_tick is not None:
+            count = min(count, self.packets_per_tick)
+
+        for _ in range(count):
+            self.emitter.send(self.packets.popleft())
+        return count
+
+    def clear(self):
+        """
+        Drop all waiting packets.
+        """
+        self.packets.clear()
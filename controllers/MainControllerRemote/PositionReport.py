@@ -0,0 +1,235 @@
+"""
+File:           PositionReport.py
+Date:           October 2026
+Description:    Compact position reports (REPORT_POSITION) : quantized position and heading.
+                A full report (keyframe) gives the quantized values, the following ones (deltas) give the
+                difference with the last keyframe, so a lost delta doesn't spoil the next ones.
+                Payloads :  "F:keyframe:x:y:heading"  (full report)
+                            "D:keyframe:dx:dy:dheading"  (delta to the keyframe)
+                A report is sent when the robot moved or turned more than a threshold, or when the last report
+                is too old, and never more often than a minimum interval.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import math
+
+# Size of a unit of the quantized position (in meters) and heading (in degrees)
+POSITION_QUANTUM = 0.01
+HEADING_QUANTUM = 1.0
+# Number of units in a turn
+HEADING_UNITS = round(360.0 / HEADING_QUANTUM)
+
+FULL_REPORT = "F"
+DELTA_REPORT = "D"
+
+# Largest difference with the keyframe sent as a delta (it fits in a byte), a keyframe is sent beyond
+MAX_DELTA = 127
+
+
+class ReportedPosition:
+    """
+    Position and heading of a robot given by its last report. It can be used as Coordinates of the robot.
+    """
+
+    __slots__ = ("x", "y", "heading", "time")
+
+    def __init__(self, x: float, y: float, heading: float, time: float):
+        """
+        Initialize the position.
+
+        Args:
+            x (float): X coordinate of the robot.
+            y (float): Y coordinate of the robot.
+            heading (float): Heading of the robot in degrees.
+            time (float): Simulation time of the reception of the report.
+        """
+        self.x = x
+        self.y = y
+        self.heading = heading
+        self.time = time
+
+
+class PositionReporter:
+    """
+    Build the position reports of the robot, when they are due.
+    """
+
+    def __init__(self, distance_threshold: float, heading_threshold: float, min_interval: float, max_interval: float,
+                 keyframe_interval: int):
+        """
+        Initialize the reporter (the first report is a keyframe).
+
+        Args:
+            distance_threshold (float): Distance (in meters) after which the position is reported.
+            heading_threshold (float): Rotation (in degrees) after which the position is reported.
+            min_interval (float): Minimum time (in seconds) between two reports.
+            max_interval (float): Maximum time (in seconds) between two reports, even if the robot doesn't move.
+            keyframe_interval (int): Number of reports between two keyframes.
+        """
+        self.distance_threshold = distance_threshold
+        self.heading_threshold = heading_threshold
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.keyframe_interval = keyframe_interval
+
+        # Last keyframe (id, x, y, heading quantized) and number of reports since it
+        self.keyframe = None
+        self.keyframe_id = 0
+        self.reports_since_keyframe = 0
+
+        # Last reported values (quantized) and time of the report
+        self.last = None
+        self.last_time = None
+
+    def report(self, x: float, y: float, heading: float, now: float):
+        """
+        Get the payload of the position report if one is due.
+
+        Args:
+            x (float): X coordinate of the robot.
+            y (float): Y coordinate of the robot.
+            heading (float): Heading of the robot in degrees.
+            now (float): The current simulation time.
+
+        Returns:
+            str: The payload of the report, None if no report is due.
+        """
+        if math.isnan(x) or math.isnan(y) or math.isnan(heading):
+            return None
+
+        quantized = (round(x / POSITION_QUANTUM), round(y / POSITION_QUANTUM),
+                     round(heading / HEADING_QUANTUM) % HEADING_UNITS)
+
+        if self.last is not None:
+            elapsed = now - self.last_time
+            if elapsed < self.min_interval:
+                return None
+
+            moved = math.hypot(quantized[0] - self.last[0], quantized[1] - self.last[1]) * POSITION_QUANTUM
+            turned = abs(wrap_heading(quantized[2] - self.last[2])) * HEADING_QUANTUM
+            if moved < self.distance_threshold and turned < self.heading_threshold and elapsed < self.max_interval:
+                return None
+
+        self.last = quantized
+        self.last_time = now
+
+        if self.keyframe is not None and self.reports_since_keyframe < self.keyframe_interval:
+            delta = (quantized[0] - self.keyframe[1], quantized[1] - self.keyframe[2],
+                     wrap_heading(quantized[2] - self.keyframe[3]))
+            if all(abs(value) <= MAX_DELTA for value in delta):
+                self.reports_since_keyframe += 1
+                return "{}:{}:{}:{}:{}".format(DELTA_REPORT, self.keyframe_id, *delta)
+
+        self.keyframe_id = (self.keyframe_id + 1) % 256
+        self.keyframe = (self.keyframe_id,) + quantized
+        self.reports_since_keyframe = 0
+        return "{}:{}:{}:{}:{}".format(FULL_REPORT, self.keyframe_id, *quantized)
+
+    def reset(self):
+        """
+        Forget the last report, the next report is a keyframe sent as soon as possible.
+        """
+        self.keyframe = None
+        self.last = None
+        self.last_time = None
+
+
+class PositionTable:
+    """
+    Last reported position of each robot, fed by the received REPORT_POSITION messages.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty table.
+        """
+        # name -> last keyframe (id, x, y, heading quantized)
+        self.keyframes = {}
+        # name -> ReportedPosition
+        self.positions = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.positions
+
+    def __iter__(self):
+        return iter(self.positions.items())
+
+    def get(self, name: str):
+        """
+        Get the last reported position of a robot.
+
+        Args:
+            name (str): Name of the robot.
+
+        Returns:
+            ReportedPosition: The position, None if the robot hasn't reported it.
+        """
+        return self.positions.get(name)
+
+    def update(self, name: str, payload: str, now: float):
+        """
+        Read a position report.
+        A delta whose keyframe hasn't been received is ignored.
+
+        Args:
+            name (str): Name of the robot which sent the report.
+            payload (str): The payload of the report.
+            now (float): The current simulation time.
+
+        Returns:
+            ReportedPosition: The new position of the robot, None if the report can't be read.
+        """
+        try:
+            kind, keyframe_id, x, y, heading = payload.split(":")
+            keyframe_id, x, y, heading = int(keyframe_id), int(x), int(y), int(heading)
+        except ValueError:
+            return None
+
+        if kind == FULL_REPORT:
+            self.keyframes[name] = (keyframe_id, x, y, heading)
+        elif kind == DELTA_REPORT:
+            keyframe = self.keyframes.get(name)
+            if keyframe is None or keyframe[0] != keyframe_id:
+                return None
+            x, y, heading = keyframe[1] + x, keyframe[2] + y, keyframe[3] + heading
+        else:
+            return None
+
+        position = ReportedPosition(x * POSITION_QUANTUM, y * POSITION_QUANTUM,
+                                    (heading % HEADING_UNITS) * HEADING_QUANTUM, now)
+        self.positions[name] = position
+        return position
+
+    def remove(self, name: str):
+        """
+        Forget the position of a robot.
+
+        Args:
+            name (str): Name of the robot.
+        """
+        self.keyframes.pop(name, None)
+        self.positions.pop(name, None)
+
+    def clear(self):
+        """
+        Forget all positions.
+        """
+        self.keyframes.clear()
+        self.positions.clear()
+
+
+def wrap_heading(units: int) -> int:
+    """
+    Bring a difference of quantized headings in [-half turn, half turn[.
+
+    Args:
+        units (int): The difference in heading units.
+
+    Returns:
+        int: The equivalent difference in [-HEADING_UNITS / 2, HEADING_UNITS / 2[.
+    """
+    return (units + HEADING_UNITS // 2) % HEADING_UNITS - HEADING_UNITS // 2
@@ -0,0 +1,277 @@
+"""
+File:           ReliableChannel.py
+Date:           October 2026
+Description:    Reliable delivery of the unicast messages : each message sent to a peer gets the next sequence number
+                of this peer, the receiver acknowledges with the sequence number it expects next (cumulative ACK),
+                and the messages not acknowledged in time are sent again.
+                At most window messages per peer are waiting for their acknowledgement (sliding window), the
+                following ones wait in the channel. The retransmit timeout follows the measured round-trip time
+                (in simulation time) and doubles after each timeout.
+                The receiver delivers the messages of a peer in their order, once, and keeps the ones arrived early.
+                After max_retries timeouts the peer is considered unreachable : its messages are dropped and its
+                sequence numbers jump forward, so the receiver starts again from the next message.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+from collections import OrderedDict, deque
+
+# Sequence numbers are sent on 2 bytes
+SEQUENCE_MODULO = 65536
+
+
+def sequence_distance(sequence: int, reference: int) -> int:
+    """
+    Get how far a sequence number is after another one (sequence numbers wrap around).
+
+    Args:
+        sequence (int): The sequence number.
+        reference (int): The reference sequence number.
+
+    Returns:
+        int: The number of messages from reference to sequence, in [0, SEQUENCE_MODULO[.
+    """
+    return (sequence - reference) % SEQUENCE_MODULO
+
+
+class OutgoingPeer:
+    """
+    Messages sent to a peer : the ones waiting for their acknowledgement and the ones waiting for the window.
+    """
+
+    __slots__ = ("next_sequence", "base", "in_flight", "waiting", "smoothed_rtt", "rtt_variation", "timeout")
+
+    def __init__(self, timeout: float):
+        # Sequence number of the next message, and of the oldest message not acknowledged
+        self.next_sequence = 0
+        self.base = 0
+        # sequence -> [message, time of the last sending, number of retransmissions], the oldest first
+        self.in_flight = OrderedDict()
+        # Messages waiting for a place in the window
+        self.waiting = deque()
+        # Round-trip time estimation (None before the first measure) and retransmit timeout (in seconds)
+        self.smoothed_rtt = None
+        self.rtt_variation = 0.0
+        self.timeout = timeout
+
+
+class IncomingPeer:
+    """
+    Messages received from a peer : the sequence number expected next and the ones arrived early.
+    """
+
+    __slots__ = ("expected", "early")
+
+    def __init__(self):
+        self.expected = 0
+        # sequence -> message received before the expected one
+        self.early = {}
+
+
+class ReliableChannel:
+    """
+    Sliding window with cumulative acknowledgements and retransmit timeouts, one per peer.
+    The channel doesn't send anything itself : it gives the messages to send (or to deliver)
+    to the communication manager.
+    """
+
+    def __init__(self, clock, window: int = 8, initial_timeout: float = 0.5, max_retries: int = 8,
+                 min_timeout: float = 0.1, max_timeout: float = 4.0):
+        """
+        Initialize the channel without any peer.
+
+        Args:
+            clock (callable): Function returning the current simulation time in seconds.
+            window (int): Maximum number of messages per peer waiting for their acknowledgement.
+            initial_timeout (float): Retransmit timeout (in seconds) before the first round-trip measure.
+            max_retries (int): Number of retransmissions of a message before the peer is considered unreachable.
+            min_timeout (float): Minimum retransmit timeout (in seconds).
+            max_timeout (float): Maximum retransmit timeout (in seconds).
+        """
+        self.clock = clock
+        self.window = window
+        self.initial_timeout = initial_timeout
+        self.max_retries = max_retries
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+
+        # peer name -> OutgoingPeer / IncomingPeer
+        self.outgoing = {}
+        self.incoming = {}
+        # peer name -> cumulative acknowledgement to send to it
+        self.pending_acks = {}
+
+    def in_flight(self) -> int:
+        """
+        Get the number of messages waiting for their acknowledgement or for the window.
+
+        Returns:
+            int: The number of messages, all peers together.
+        """
+        return sum(len(peer.in_flight) + len(peer.waiting) for peer in self.outgoing.values())
+
+    def send(self, peer_name: str, message) -> list:
+        """
+        Give a sequence number to a message for a peer, and send it if the window allows it.
+
+        Args:
+            peer_name (str): Name of the recipient.
+            message (Message): The message.
+
+        Returns:
+            list: The messages to send now (the message, or nothing if the window is full).
+        """
+        peer = self.outgoing.get(peer_name)
+        if peer is None:
+            peer = OutgoingPeer(self.initial_timeout)
+            self.outgoing[peer_name] = peer
+
+        peer.waiting.append(message)
+        return self._fill_window(peer)
+
+    def acknowledge(self, peer_name: str, cumulative: int) -> list:
+        """
+        Read an acknowledgement : every message before the cumulative sequence number has been received.
+
+        Args:
+            peer_name (str): Name of the peer which sent the acknowledgement.
+            cumulative (int): The sequence number expected next by the peer.
+
+        Returns:
+            list: The messages to send now (the window moved forward).
+        """
+        peer = self.outgoing.get(peer_name)
+        if peer is None:
+            return []
+
+        acknowledged = sequence_distance(cumulative, peer.base)
+        if acknowledged == 0 or acknowledged > len(peer.in_flight):
+            # Nothing new, or an acknowledgement of messages that haven't been sent (the peer restarted)
+            return []
+
+        now = self.clock()
+        rtt_sample = None
+        for _ in range(acknowledged):
+            _, (_, sent_time, retries) = peer.in_flight.popitem(last=False)
+            # Only the messages sent once give a round-trip time (Karn's algorithm)
+            if retries == 0:
+                rtt_sample = now - sent_time
+        peer.base = cumulative
+
+        if rtt_sample is not None:
+            self._update_timeout(peer, rtt_sample)
+        return self._fill_window(peer)
+
+    def receive(self, peer_name: str, message) -> list:
+        """
+        Read a reliable message and plan its acknowledgement.
+
+        Args:
+            peer_name (str): Name of the sender.
+            message (Message): The message, with its reliable_sequence.
+
+        Returns:
+            list: The messages to deliver, in their order (none if the message is a copy or arrived early).
+        """
+        peer = self.incoming.get(peer_name)
+        if peer is None:
+            peer = IncomingPeer()
+            self.incoming[peer_name] = peer
+
+        sequence = message.reliable_sequence
+        ahead = sequence_distance(sequence, peer.expected)
+        delivered = []
+        if ahead < self.window:
+            peer.early.setdefault(sequence, message)
+            while peer.expected in peer.early:
+                delivered.append(peer.early.pop(peer.expected))
+                peer.expected = (peer.expected + 1) % SEQUENCE_MODULO
+        elif sequence_distance(peer.expected, sequence) > self.window:
+            # Neither a copy of a received message nor inside the window : the sender started again
+            peer.early.clear()
+            peer.expected = (sequence + 1) % SEQUENCE_MODULO
+            delivered.append(message)
+
+        # Copies are acknowledged too : the previous acknowledgement may have been lost
+        self.pending_acks[peer_name] = peer.expected
+        return delivered
+
+    def take_acks(self) -> dict:
+        """
+        Get the acknowledgements to send (one per peer, the latest) and forget them.
+
+        Returns:
+            dict: peer name -> cumulative sequence number.
+        """
+        acks = self.pending_acks
+        self.pending_acks = {}
+        return acks
+
+    def retransmissions(self):
+        """
+        Get the messages whose retransmit timeout has expired, and drop the messages of the unreachable peers.
+
+        Returns:
+            tuple: The messages to send again (list), and the (peer name, message) dropped (list).
+        """
+        now = self.clock()
+        resend = []
+        dropped = []
+        for peer_name, peer in self.outgoing.items():
+            expired = [entry for entry in peer.in_flight.values() if now - entry[1] >= peer.timeout]
+            if not expired:
+                continue
+
+            if any(entry[2] >= self.max_retries for entry in expired):
+                dropped.extend((peer_name, message) for message in self._reset(peer))
+                continue
+
+            for entry in expired:
+                entry[1] = now
+                entry[2] += 1
+                resend.append(entry[0])
+            peer.timeout = min(peer.timeout * 2, self.max_timeout)
+        return resend, dropped
+
+    def _fill_window(self, peer: OutgoingPeer) -> list:
+        """
+        Number and mark as sent the waiting messages which fit in the window.
+        """
+        now = self.clock()
+        sent = []
+        while peer.waiting and len(peer.in_flight) < self.window:
+            message = peer.waiting.popleft()
+            message.reliable_sequence = peer.next_sequence
+            peer.in_flight[peer.next_sequence] = [message, now, 0]
+            peer.next_sequence = (peer.next_sequence + 1) % SEQUENCE_MODULO
+            sent.append(message)
+        return sent
+
+    def _update_timeout(self, peer: OutgoingPeer, rtt_sample: float):
+        """
+        Update the round-trip time estimation and the retransmit timeout (RFC 6298).
+        """
+        if peer.smoothed_rtt is None:
+            peer.smoothed_rtt = rtt_sample
+            peer.rtt_variation = rtt_sample / 2
+        else:
+            peer.rtt_variation = 0.75 * peer.rtt_variation + 0.25 * abs(peer.smoothed_rtt - rtt_sample)
+            peer.smoothed_rtt = 0.875 * peer.smoothed_rtt + 0.125 * rtt_sample
+        peer.timeout = min(max(peer.smoothed_rtt + 4 * peer.rtt_variation, self.min_timeout), self.max_timeout)
+
+    def _reset(self, peer: OutgoingPeer) -> list:
+        """
+        Drop the messages of an unreachable peer. The next sequence number jumps beyond anything the peer can
+        expect (2 windows after the last one sent), so if it comes back it starts again from the next message.
+
+        Returns:
+            list: The dropped messages.
+        """
+        dropped = [entry[0] for entry in peer.in_flight.values()] + list(peer.waiting)
+        peer.in_flight.clear()
+        peer.waiting.clear()
+        peer.next_sequence = (peer.next_sequence + 2 * self.window) % SEQUENCE_MODULO
+        peer.base = peer.next_sequence
+        peer.timeout = self.initial_timeout
+        peer.smoothed_rtt = None
+        return dropped
@@ -6,9 +6,18 @@ Author:         Nordine HIDA
 Modifications:
 """
 
+import math
 from controller.robot import *
-from Message import *
-from typing import List
+from MessageQueue import *
+from Outbox import *
+from Logger import *
+from Metrics import *
+from Profiler import *
+from NeighborTable import *
+from FleetIndex import *
+from TaskAllocator import *
+from PositionReport import *
+from SpatialIndex import *
 
 
 class RobotUpRemote:
@@ -21,17 +30,106 @@ class RobotUpRemote:
         Constructor for RobotUpRemote class. Init all attributes
         """
         self.remote = Robot()
-        self.list_messages: List[Message] = []
 
-        # list of nearby robots
-        self.known_robots = {}
+        # Logging : minimum level of the kept records (ring buffer of the ring_size last records), of the records
+        # printed on the console and of the records written in log_file (None for no file) (CAN BE MODIFIED)
+        # Levels : DEBUG (each message sent and received), INFO, WARNING, ERROR, OFF
+        self.log_level = DEBUG
+        self.console_log_level = INFO
+        self.log_file = None
+        self.log_ring_size = 1000
+        self.logger = Logger(self.getName(), self.getTime, self.log_level, self.console_log_level, self.log_file,
+                             DEBUG, self.log_ring_size)
+        # The last records are printed if the controller crashes
+        self.logger.install_crash_dump()
 
-        # dictionary of nearby robots and the last time I received a communication from it (updated in networkManager)
-        self.neighbors_last_com = None
+        # Metrics of the message pipeline (counters, backlogs, latencies), appended every metrics_period seconds
+        # of simulation as JSON lines to metrics_file, for example "metrics_" + name + ".jsonl" (CAN BE MODIFIED)
+        # None disables them
+        self.metrics_file = None
+        self.metrics_period = 10.0
+        self.metrics = None
+        if self.metrics_file:
+            self.metrics = Metrics(self.getName(), self.getTime, self.metrics_file, self.metrics_period)
 
-        # First free remote in known_robots. Messages will be sent to it
+        # Profiler of the ticks, set by the main program from the environment variables (see Profiler.py)
+        # None when the profiling is disabled
+        self.profiler = None
+
+        # Devices already resolved, by name (filled by getDevice)
+        self.devices = {}
+
+        # Sampling period (in ms) of the devices used by this controller (CAN BE MODIFIED)
+        # It is rounded up to a multiple of the basic time step (0 samples at each step), None disables the device.
+        # The devices which aren't listed are never enabled.
+        self.sampling_profile = {"receiver": 0}
+        # Current sampling period of the devices (applied when a device is resolved, see set_sampling_profile)
+        self.sampling_periods = {}
+
+        # Waiting time (in seconds) after which a queued message gains one level of priority (CAN BE MODIFIED)
+        # None disables the aging
+        self.message_aging_period = 1.0
+        # True to keep only the latest queued message from a sender for the message types where only the latest
+        # matters : the state messages STATUS_CURRENT_TASK, STATUS_GOTOCOORDINATES and REPORT_POSITION
+        # (see MESSAGE_TYPE_PRIORITY.is_coalesced) (CAN BE MODIFIED)
+        self.coalesce_messages = True
+        # Messages to process, ordered by priority
+        self.list_messages = MessageQueue(self.message_aging_period, self.getTime, self.coalesce_messages)
+
+        # Wire format of the sent messages, "binary" or "text" (CAN BE MODIFIED)
+        # Both formats are understood on reception, so controllers using different formats can talk together
+        self.wire_format = "binary"
+
+        # Maximum number of packets emitted per simulation step, the others wait for the next step (CAN BE MODIFIED)
+        # None is unlimited
+        self.packets_per_tick = 20
+        # Packets sent during the tick, emitted together at the next step
+        self.outbox = Outbox(self.getDevice("emitter"), self.packets_per_tick)
+
+        # Reliable delivery of the unicast messages of the task traffic (GO_TO_COORDINATES, STATUS_FREE, see
+        # MESSAGE_TYPE_PRIORITY.is_reliable) : acknowledged by the recipient and sent again if lost (CAN BE MODIFIED)
+        # The window is the number of messages per recipient waiting for their acknowledgement (the next ones wait),
+        # the timeout (in seconds of simulation) is used until the round-trip time is measured, and the recipient is
+        # considered unreachable after max_retries retransmissions of a message (its messages are dropped).
+        self.reliable_unicast = True
+        self.reliable_window = 8
+        self.reliable_initial_timeout = 0.5
+        self.reliable_max_retries = 8
+
+        # list of nearby robots and their status
+        self.known_robots = FleetIndex()
+
+        # Time (in seconds) without communication after which a robot is considered OUT OF RANGE (CAN BE MODIFIED)
+        # It should stay well above the heartbeat_max_period of the robots (see RobotUp), or the stable robots
+        # would expire between two heartbeats.
+        self.neighbor_expiry = 25.0
+        # nearby robots and the last time I received a communication from it (updated in networkManager)
+        self.neighbors = NeighborTable(self.neighbor_expiry)
+
+        # Last reported position of the robots (updated in networkManager)
+        self.fleet_positions = PositionTable()
+        # Size (in meters) of the cells of the spatial index of the reported positions (CAN BE MODIFIED)
+        self.spatial_cell_size = 1.0
+        # Reported positions indexed by a uniform grid, for the nearest robots and radius queries
+        self.spatial_index = SpatialIndex(self.spatial_cell_size)
+
+        # First free remote in known_robots. Messages will be sent to it when no robot can be chosen by the allocator
         self.first_rob = ""
 
+        # Allocate the coordinates to the robots by minimum total cost, instead of sending them to first_rob (CAN BE MODIFIED)
+        # Disabled by default : the coordinates go to first_rob and are passed along the fleet (circuit formation)
+        self.allocate_tasks = False
+        # Estimated travel speed of a robot in m/s, used to estimate the completion time of its queue (CAN BE MODIFIED)
+        self.robot_speed = 0.5
+        # Largest batch of coordinates assigned optimally (Hungarian algorithm), larger ones are greedy (CAN BE MODIFIED)
+        self.max_optimal_batch = 50
+        # Above this number of robots, only the allocation_neighbors closest robots of each coordinates are candidates
+        # (among the robots with a reported position) (CAN BE MODIFIED)
+        self.max_allocation_candidates = 20
+        self.allocation_neighbors = 3
+        # Allocator of the coordinates, it keeps the positions of the robots and the estimated end of their queue
+        self.allocator = TaskAllocator(self.robot_speed, self.max_optimal_batch)
+
         # boolean to remember if the remote has already call rolled
         self.is_callrolling = False
 
@@ -40,6 +138,7 @@ class RobotUpRemote:
     def getDevice(self, name: str) -> Device:
         """
         Get a device by its name.
+        The device is resolved once, then it is taken from the registry of devices.
 
         Args:
             name (str): Name of the device.
@@ -47,7 +146,47 @@ class RobotUpRemote:
         Returns:
             Device: Device object if found, None otherwise.
         """
-        return self.remote.getDevice(name)
+        device = self.devices.get(name)
+        if device is None:
+            device = self.remote.getDevice(name)
+            if device is not None:
+                self.devices[name] = device
+                # The device is enabled at its first access
+                if name in self.sampling_periods:
+                    self.set_sampling_period(device, self.sampling_periods[name])
+        return device
+
+    def set_sampling_profile(self, profile: dict):
+        """
+        Change the sampling period of devices, it can be done at any time.
+        The devices already resolved are changed now, the others at their first access (see getDevice).
+
+        Args:
+            profile (dict): Sampling period (in ms) by device name, None disables the device.
+        """
+        for name, period in profile.items():
+            self.sampling_periods[name] = period
+            device = self.devices.get(name)
+            if device is not None:
+                self.set_sampling_period(device, period)
+
+    def set_sampling_period(self, device: Device, period):
+        """
+        Enable a device with a sampling period rounded up to a multiple of the basic time step, or disable it.
+        The devices which can't be enabled (motors, emitter ...) are ignored.
+
+        Args:
+            device (Device): The device.
+            period (int): The sampling period in ms (0 is the basic time step), None disables the device.
+        """
+        if not callable(getattr(device, 'enable', None)):
+            return
+
+        if period is None:
+            device.disable()
+        else:
+            basic_time_step = int(self.getBasicTimeStep())
+            device.enable(max(1, math.ceil(period / basic_time_step)) * basic_time_step)
 
     def getBasicTimeStep(self) -> float:
         """
@@ -67,9 +206,19 @@ class RobotUpRemote:
         """
         return self.remote.getName()
 
+    def getTime(self) -> float:
+        """
+        Get the current simulation time.
+
+        Returns:
+            float: Simulation time in seconds.
+        """
+        return self.remote.getTime()
+
     def step(self, time_step):
         """
         Perform a simulation step with the given time step.
+        The packets sent since the last step are emitted first (and the metrics exported when due).
 
         Args:
             time_step (int, optional): Time step in milliseconds. Defaults to None.
@@ -77,19 +226,30 @@ class RobotUpRemote:
         Returns:
             int: Result of the simulation step.
         """
-        self.remote.step(time_step)
+        emitted = self.outbox.flush()
+        if self.metrics is not None:
+            self.metrics.count("packets_emitted", emitted)
+            self.metrics.gauge("outbox_backlog", len(self.outbox))
+            self.metrics.export_if_due()
+        if self.profiler is None:
+            return self.remote.step(time_step)
 
-    def append(self, message: Message):
+        self.profiler.lap("emit")
+        result = self.remote.step(time_step)
+        self.profiler.end_tick("step")
+        return result
+
+    def append(self, message: Message) -> bool:
         """
-        Add a message to the list of messages, sorting it based on message priority.
+        Add a message to the queue of messages, ordered by message priority.
 
         Args:
-            message (Message): The message to append to the list.
+            message (Message): The message to append to the queue.
+
+        Returns:
+            bool: True if the message replaced a queued message from the same sender (coalescing).
         """
-        priority = MESSAGE_TYPE_PRIORITY.priority(str(message.message_type))
-        index = next((i for i, msg in enumerate(self.list_messages) if MESSAGE_TYPE_PRIORITY.priority(str(msg.message_type)) < priority),
-                     len(self.list_messages))
-        self.list_messages.insert(index, message)
+        return self.list_messages.push(message)
 
     def getKeyboard(self):
         """
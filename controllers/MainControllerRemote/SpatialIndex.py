@@ -0,0 +1,194 @@
+"""
+File:           SpatialIndex.py
+Date:           October 2026
+Description:    Uniform grid of the robots' positions, updated on each position report.
+                It answers "which robots are the closest to (x;y)" (k nearest) and "which robots are within r
+                of (x;y)" by looking only at the cells around the point, instead of all the robots.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import math
+
+
+class SpatialIndex:
+    """
+    Uniform grid of the robots' positions.
+    The queries can be restricted to some robots (for example the free ones).
+    """
+
+    def __init__(self, cell_size: float):
+        """
+        Initialize an empty grid.
+
+        Args:
+            cell_size (float): Size of a cell (in meters), about the distance between the robots works well.
+        """
+        self.cell_size = cell_size
+
+        # (column, row) -> {name: (x, y)} of the robots in the cell
+        self.cells = {}
+        # name -> (x, y, cell) of each robot
+        self.robots = {}
+
+        # Bounds of the occupied cells (min column, min row, max column, max row), None when to compute again
+        self.bounds = None
+
+    def __len__(self) -> int:
+        return len(self.robots)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.robots
+
+    def cell_of(self, x: float, y: float):
+        """
+        Get the cell of a point.
+
+        Args:
+            x (float): X coordinate.
+            y (float): Y coordinate.
+
+        Returns:
+            tuple: The (column, row) of the cell.
+        """
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def update(self, name: str, x: float, y: float):
+        """
+        Add a robot or move it.
+
+        Args:
+            name (str): Name of the robot.
+            x (float): X coordinate of the robot.
+            y (float): Y coordinate of the robot.
+        """
+        cell = self.cell_of(x, y)
+        previous = self.robots.get(name)
+        if previous is not None and previous[2] != cell:
+            self._remove_from_cell(name, previous[2])
+
+        self.robots[name] = (x, y, cell)
+        if cell not in self.cells:
+            self.cells[cell] = {}
+            self.bounds = None
+        self.cells[cell][name] = (x, y)
+
+    def remove(self, name: str):
+        """
+        Remove a robot.
+
+        Args:
+            name (str): Name of the robot.
+        """
+        previous = self.robots.pop(name, None)
+        if previous is not None:
+            self._remove_from_cell(name, previous[2])
+
+    def clear(self):
+        """
+        Remove all robots.
+        """
+        self.cells.clear()
+        self.robots.clear()
+        self.bounds = None
+
+    def nearest(self, x: float, y: float, k: int = 1, accept=None) -> list:
+        """
+        Get the k robots the closest to a point.
+        The rings of cells around the point are searched until k robots are found closer than the next ring.
+
+        Args:
+            x (float): X coordinate of the point.
+            y (float): Y coordinate of the point.
+            k (int): Number of robots wanted.
+            accept (callable): Function telling if a robot (its name) can be returned, None for all robots.
+
+        Returns:
+            list: The (distance, name) of the closest robots, the closest first (less than k if there aren't enough).
+        """
+        if not self.robots or k <= 0:
+            return []
+
+        column, row = self.cell_of(x, y)
+        min_column, min_row, max_column, max_row = self._get_bounds()
+        last_ring = max(column - min_column, max_column - column, row - min_row, max_row - row)
+
+        found = []
+        for ring in range(last_ring + 1):
+            for cell in self._ring_cells(column, row, ring):
+                for name, (robot_x, robot_y) in self.cells.get(cell, {}).items():
+                    if accept is None or accept(name):
+                        found.append((math.hypot(robot_x - x, robot_y - y), name))
+
+            # Every robot closer than ring * cell_size has been seen
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= ring * self.cell_size:
+                    break
+
+        found.sort()
+        return found[:k]
+
+    def within(self, x: float, y: float, radius: float, accept=None) -> list:
+        """
+        Get the robots within a distance of a point.
+
+        Args:
+            x (float): X coordinate of the point.
+            y (float): Y coordinate of the point.
+            radius (float): The distance.
+            accept (callable): Function telling if a robot (its name) can be returned, None for all robots.
+
+        Returns:
+            list: The (distance, name) of the robots within the distance, the closest first.
+        """
+        min_column, min_row = self.cell_of(x - radius, y - radius)
+        max_column, max_row = self.cell_of(x + radius, y + radius)
+
+        # Look at the cells covering the circle, or at the occupied cells if there are fewer
+        if (max_column - min_column + 1) * (max_row - min_row + 1) <= len(self.cells):
+            cells = ((column, row) for column in range(min_column, max_column + 1)
+                     for row in range(min_row, max_row + 1))
+        else:
+            cells = [cell for cell in self.cells
+                     if min_column <= cell[0] <= max_column and min_row <= cell[1] <= max_row]
+
+        found = []
+        for cell in cells:
+            for name, (robot_x, robot_y) in self.cells.get(cell, {}).items():
+                if accept is None or accept(name):
+                    distance = math.hypot(robot_x - x, robot_y - y)
+                    if distance <= radius:
+                        found.append((distance, name))
+
+        found.sort()
+        return found
+
+    def _remove_from_cell(self, name: str, cell):
+        robots = self.cells[cell]
+        del robots[name]
+        if not robots:
+            del self.cells[cell]
+            self.bounds = None
+
+    def _get_bounds(self):
+        if self.bounds is None:
+            columns = [cell[0] for cell in self.cells]
+            rows = [cell[1] for cell in self.cells]
+            self.bounds = (min(columns), min(rows), max(columns), max(rows))
+        return self.bounds
+
+    @staticmethod
+    def _ring_cells(column: int, row: int, ring: int):
+        """
+        Get the cells at a given ring (Chebyshev distance in cells) around a cell.
+        """
+        if ring == 0:
+            yield column, row
+            return
+        for d_column in range(-ring, ring + 1):
+            yield column + d_column, row - ring
+            yield column + d_column, row + ring
+        for d_row in range(-ring + 1, ring):
+            yield column - ring, row + d_row
+            yield column + ring, row + d_row
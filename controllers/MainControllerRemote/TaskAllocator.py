@@ -0,0 +1,242 @@
+"""
+File:           TaskAllocator.py
+Date:           October 2026
+Description:    Allocation of a batch of coordinates to the robots by minimum total cost.
+                The cost of a robot for a coordinate is the time it needs to finish its queue (estimated from the
+                coordinates already given to it) plus the travel time from where it will be.
+                The batch is assigned by rounds (one coordinate per robot and per round) with the Hungarian
+                algorithm, or greedily when the batch is too large.
+Author:         Nordine HIDA
+Modifications:
+"""
+
+import math
+from Coordinates import *
+
+
+class TaskAllocator:
+    """
+    Allocate batches of coordinates to the robots by minimum total cost,
+    from the last known positions of the robots and the estimated completion time of their queue.
+    """
+
+    def __init__(self, speed: float, max_optimal_batch: int):
+        """
+        Initialize the allocator without any knowledge of the robots.
+
+        Args:
+            speed (float): Estimated travel speed of a robot (in m/s).
+            max_optimal_batch (int): Largest batch assigned with the Hungarian algorithm, larger ones are greedy.
+        """
+        self.speed = speed
+        self.max_optimal_batch = max_optimal_batch
+
+        # name -> last known position (reached or being reached) of the robot
+        self.positions = {}
+        # name -> estimated end of the queue of coordinates given to the robot (simulation time) and its last coordinates
+        self.busy_until = {}
+        self.end_positions = {}
+
+    def observe_position(self, name: str, x: float, y: float):
+        """
+        Remember where a robot is, or where it is going (from its status messages).
+
+        Args:
+            name (str): Name of the robot.
+            x (float): X coordinate.
+            y (float): Y coordinate.
+        """
+        self.positions[name] = Coordinates(x, y)
+
+    def forget(self):
+        """
+        Forget the queues of the robots (they have been stopped), their positions are kept.
+        """
+        self.busy_until.clear()
+        self.end_positions.clear()
+
+    def allocate(self, waypoints: list, robots: list, now: float) -> list:
+        """
+        Assign a batch of coordinates to robots by minimum total cost, and update the queues of the robots.
+        The robots without known position are skipped (their cost can't be estimated).
+
+        Args:
+            waypoints (list): The coordinates to assign.
+            robots (list): Names of the robots that can receive coordinates.
+            now (float): The current simulation time.
+
+        Returns:
+            list: The (robot name, coordinates) pairs, in the order the robots should receive them.
+                  Empty if no robot has a known position.
+        """
+        robots = [robot for robot in robots if robot in self.positions]
+        if not robots:
+            return []
+
+        assignments = []
+        remaining = list(waypoints)
+        while remaining:
+            # One round : at most one coordinate per robot
+            cost = [[self.cost(robot, waypoint, now) for waypoint in remaining] for robot in robots]
+            if len(remaining) > self.max_optimal_batch:
+                pairs = greedy_assignment(cost)
+            else:
+                pairs = hungarian_assignment(cost)
+
+            assigned = set()
+            for robot_index, waypoint_index in pairs:
+                robot = robots[robot_index]
+                waypoint = remaining[waypoint_index]
+                self.assign(robot, waypoint, now)
+                assignments.append((robot, waypoint))
+                assigned.add(waypoint_index)
+
+            remaining = [waypoint for index, waypoint in enumerate(remaining) if index not in assigned]
+        return assignments
+
+    def cost(self, robot: str, waypoint: Coordinates, now: float) -> float:
+        """
+        Get the estimated time for a robot to reach coordinates : end of its queue plus the travel.
+
+        Args:
+            robot (str): Name of the robot.
+            waypoint (Coordinates): The coordinates.
+            now (float): The current simulation time.
+
+        Returns:
+            float: The estimated time in seconds.
+        """
+        queue_time, start = self.queue_end(robot, now)
+        return queue_time + self.travel_time(start, waypoint)
+
+    def assign(self, robot: str, waypoint: Coordinates, now: float):
+        """
+        Add coordinates at the end of the estimated queue of a robot.
+
+        Args:
+            robot (str): Name of the robot.
+            waypoint (Coordinates): The coordinates.
+            now (float): The current simulation time.
+        """
+        queue_time, start = self.queue_end(robot, now)
+        self.busy_until[robot] = now + queue_time + self.travel_time(start, waypoint)
+        self.end_positions[robot] = waypoint
+
+    def queue_end(self, robot: str, now: float):
+        """
+        Get when and where a robot (with a known position) will finish its queue.
+
+        Args:
+            robot (str): Name of the robot.
+            now (float): The current simulation time.
+
+        Returns:
+            tuple: The remaining time of its queue (in seconds) and the coordinates where it will be.
+        """
+        busy_until = self.busy_until.get(robot, now)
+        if busy_until > now:
+            return busy_until - now, self.end_positions[robot]
+        return 0.0, self.positions[robot]
+
+    def travel_time(self, start: Coordinates, end: Coordinates) -> float:
+        """
+        Get the estimated travel time between two coordinates.
+
+        Args:
+            start (Coordinates): Start coordinates.
+            end (Coordinates): End coordinates.
+
+        Returns:
+            float: The travel time in seconds.
+        """
+        return math.hypot(end.x - start.x, end.y - start.y) / self.speed
+
+
+def hungarian_assignment(cost: list) -> list:
+    """
+    Assign the rows to the columns of a cost matrix by minimum total cost (Hungarian algorithm, O(n^2 m)).
+    If the matrix isn't square, only min(rows, columns) pairs are made.
+
+    Args:
+        cost (list): The cost matrix (list of rows).
+
+    Returns:
+        list: The (row, column) pairs.
+    """
+    if not cost or not cost[0]:
+        return []
+
+    transposed = len(cost) > len(cost[0])
+    if transposed:
+        cost = [list(column) for column in zip(*cost)]
+
+    # Rows are matched to columns, rows <= columns. Indexes start at 1, the column 0 is a virtual one.
+    rows, columns = len(cost), len(cost[0])
+    row_potential = [0.0] * (rows + 1)
+    column_potential = [0.0] * (columns + 1)
+    column_match = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+
+    for row in range(1, rows + 1):
+        column_match[0] = row
+        current_column = 0
+        min_slack = [math.inf] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[current_column] = True
+            current_row = column_match[current_column]
+            delta = math.inf
+            next_column = 0
+            for column in range(1, columns + 1):
+                if not used[column]:
+                    slack = cost[current_row - 1][column - 1] - row_potential[current_row] - column_potential[column]
+                    if slack < min_slack[column]:
+                        min_slack[column] = slack
+                        way[column] = current_column
+                    if min_slack[column] < delta:
+                        delta = min_slack[column]
+                        next_column = column
+            for column in range(columns + 1):
+                if used[column]:
+                    row_potential[column_match[column]] += delta
+                    column_potential[column] -= delta
+                else:
+                    min_slack[column] -= delta
+            current_column = next_column
+            if column_match[current_column] == 0:
+                break
+
+        # Augment the matching along the path
+        while current_column:
+            previous_column = way[current_column]
+            column_match[current_column] = column_match[previous_column]
+            current_column = previous_column
+
+    pairs = [(column_match[column] - 1, column - 1) for column in range(1, columns + 1) if column_match[column]]
+    if transposed:
+        pairs = [(column, row) for row, column in pairs]
+    return sorted(pairs)
+
+
+def greedy_assignment(cost: list) -> list:
+    """
+    Assign the rows to the columns of a cost matrix greedily : the cheapest pairs first.
+    If the matrix isn't square, only min(rows, columns) pairs are made.
+
+    Args:
+        cost (list): The cost matrix (list of rows).
+
+    Returns:
+        list: The (row, column) pairs.
+    """
+    candidates = sorted((value, row, column) for row, values in enumerate(cost) for column, value in enumerate(values))
+
+    used_rows = set()
+    used_columns = set()
+    pairs = []
+    for _, row, column in candidates:
+        if row not in used_rows and column not in used_columns:
+            used_rows.add(row)
+            used_columns.add(column)
+            pairs.append((row, column))
+    return sorted(pairs)
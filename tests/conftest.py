@@ -0,0 +1,25 @@
+"""
+Test configuration : the modules of the robot's controller are imported from controllers/MainController,
+the modules only the remote has (TaskAllocator ...) from controllers/MainControllerRemote.
+Outside of webots, the "controller" package isn't available : a minimal one (Robot and Device names only) is
+provided, the tests never start a simulation.
+"""
+
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "controllers", "MainController"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "controllers", "MainControllerRemote"))
+
+try:
+    import controller.robot  # noqa: F401
+except ImportError:
+    controller = types.ModuleType("controller")
+    controller.__path__ = []
+    controller_robot = types.ModuleType("controller.robot")
+    controller_robot.Robot = object
+    controller_robot.Device = object
+    controller.robot = controller_robot
+    sys.modules["controller"] = controller
+    sys.modules["controller.robot"] = controller_robot
@@ -0,0 +1,80 @@
+"""
+In-memory radio for the tests : controllers with an emitter and a receiver, and a clock advanced by tick().
+"""
+
+from CommunicationManager import *
+
+
+class FakeEmitter:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, packet: bytes):
+        self.sent.append(packet)
+
+
+class FakeReceiver:
+    def __init__(self):
+        self.packets = []
+
+    def getQueueLength(self) -> int:
+        return len(self.packets)
+
+    def getBytes(self) -> bytes:
+        return self.packets[0]
+
+    def nextPacket(self):
+        self.packets.pop(0)
+
+
+class FakeRobot:
+    """
+    The attributes of a RobotUp used by the CommunicationManager, without webots.
+    """
+
+    def __init__(self, name: str, clock: list, known_robots=None, wire_format: str = "binary"):
+        self.name = name
+        self.clock = clock
+        self.wire_format = wire_format
+        self.known_robots = known_robots
+        self.metrics = None
+        self.logger = Logger(name, self.getTime, console_level=OFF)
+        self.reliable_unicast = True
+        self.reliable_window = 8
+        self.reliable_initial_timeout = 0.5
+        self.reliable_max_retries = 8
+        self.emitter = FakeEmitter()
+        self.receiver = FakeReceiver()
+        self.outbox = Outbox(self.emitter)
+        self.list_messages = MessageQueue()
+
+    def getName(self) -> str:
+        return self.name
+
+    def getTime(self) -> float:
+        return self.clock[0]
+
+    def getBasicTimeStep(self) -> float:
+        return 32
+
+    def getDevice(self, name: str):
+        return self.emitter if name == "emitter" else self.receiver
+
+    def append(self, message: Message) -> bool:
+        return self.list_messages.push(message)
+
+
+def tick(clock: list, robots: list, managers: list, delivered: bool = True):
+    """
+    Emit the packets of every robot, deliver them to the others (if delivered), then let each one receive.
+    """
+    for robot in robots:
+        robot.emitter.sent.clear()
+        robot.outbox.flush()
+        if delivered:
+            for other in robots:
+                if other is not robot:
+                    other.receiver.packets.extend(robot.emitter.sent)
+    for manager in managers:
+        manager.receive_message()
+    clock[0] += 0.032
@@ -0,0 +1,17 @@
+import Heartbeat
+
+
+def test_change_never_delays_the_heartbeat():
+    heartbeat = Heartbeat.Heartbeat(1.6, 8.0, jitter=0.0)
+    heartbeat.observe("a", 0.0)
+    heartbeat.observe("b", 1.0)
+    assert heartbeat.is_due(1.6)
+
+
+def test_change_brings_the_heartbeat_back_to_the_minimum_period():
+    heartbeat = Heartbeat.Heartbeat(1.6, 8.0, jitter=0.0)
+    heartbeat.observe("a", 0.0)
+    assert heartbeat.is_due(1.6)
+    assert not heartbeat.is_due(4.0)
+    heartbeat.observe("b", 4.0)
+    assert heartbeat.is_due(5.6)
@@ -0,0 +1,56 @@
+from radio import *
+
+
+def round_trip(codec: MessageCodec, payload: str) -> Message:
+    message = Message("A", MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES, 3, payload, "B")
+    message.origin, message.sequence = "A", 7
+    return codec.decode(codec.encode(message))
+
+
+def test_coordinates_come_back_with_the_same_values():
+    message = round_trip(MessageCodec("binary"), "1:2")
+    assert message.payload == "1.0:2.0"
+    assert [float(value) for value in message.payload.split(":")] == [1.0, 2.0]
+
+
+def test_text_payload_is_given_back_unchanged():
+    message = round_trip(MessageCodec("binary"), "0.1:abc")
+    assert message.payload == "0.1:abc"
+
+
+def test_malformed_packet_is_dropped():
+    clock = [0.0]
+    robot = FakeRobot("B", clock)
+    manager = CommunicationManager(robot)
+    robot.receiver.packets.extend([b"\xfc\x01", b"garbage"])
+
+    manager.receive_message()
+
+    assert robot.receiver.packets == []
+    assert len(robot.list_messages) == 0
+
+
+def test_old_text_layout_is_decoded_without_id():
+    codec = MessageCodec("text", "B")
+    message = codec.decode(b"A;MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES;1;1.5:2;B")
+    assert message.id_sender == "A"
+    assert message.payload == "1.5:2"
+    assert message.recipient == "B"
+    assert message.origin is None and message.sequence is None
+
+
+def test_text_layout_with_id():
+    codec = MessageCodec("text", "B")
+    message = codec.decode(b"A;MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES;1;1.5;2;B;;7+3")
+    assert message.payload == "1.5;2"
+    assert (message.origin, message.sequence, message.reliable_sequence) == ("A", 7, 3)
+
+
+def test_only_flooded_messages_are_remembered():
+    clock = [0.0]
+    robot = FakeRobot("A", clock)
+    manager = CommunicationManager(robot)
+    manager.send_message(Message("A", MESSAGE_TYPE_PRIORITY.REPORT_POSITION, 0, "F:1:2:3:4", ""))
+    manager.send_message(Message("A", MESSAGE_TYPE_PRIORITY.STOP, 0, "STOP", ""))
+    assert len(manager.received_ids) == 1
+    assert len(manager.relayed_ids) == 1
@@ -0,0 +1,50 @@
+from radio import *
+
+
+def test_old_message_does_not_go_before_stop():
+    clock = [0.0]
+    queue = MessageQueue(aging_period=1.0, clock=lambda: clock[0])
+    queue.push(Message("A", MESSAGE_TYPE_PRIORITY.REPORT_STATUS, 0, "", ""))
+    clock[0] = 100.0
+    queue.push(Message("B", MESSAGE_TYPE_PRIORITY.STOP, 0, "STOP", ""))
+
+    assert queue.pop().message_type == MESSAGE_TYPE_PRIORITY.STOP
+    assert queue.pop().message_type == MESSAGE_TYPE_PRIORITY.REPORT_STATUS
+
+
+def test_old_message_goes_before_newer_urgent_message():
+    clock = [0.0]
+    queue = MessageQueue(aging_period=1.0, clock=lambda: clock[0])
+    queue.push(Message("A", MESSAGE_TYPE_PRIORITY.REPORT_STATUS, 0, "", ""))
+    clock[0] = 100.0
+    queue.push(Message("B", MESSAGE_TYPE_PRIORITY.STATUS_GOTOCOORDINATES, 0, "1:2", ""))
+
+    assert queue.pop().message_type == MESSAGE_TYPE_PRIORITY.REPORT_STATUS
+
+
+def test_status_is_coalesced():
+    queue = MessageQueue(coalesce=True)
+    assert not queue.push(Message("A", MESSAGE_TYPE_PRIORITY.STATUS_CURRENT_TASK, 0, "first", "B"))
+    assert queue.push(Message("A", MESSAGE_TYPE_PRIORITY.STATUS_CURRENT_TASK, 0, "second", "B"))
+
+    assert len(queue) == 1
+    assert queue.pop().payload == "second"
+
+
+def test_roll_calls_are_not_coalesced():
+    queue = MessageQueue(coalesce=True)
+    queue.push(Message("A", MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL, 0, "", ""))
+    queue.push(Message("A", MESSAGE_TYPE_PRIORITY.REPORT_BEGIN_ROLLCALL, 1, "", ""))
+
+    assert len(queue) == 2
+    assert [queue.pop().send_counter, queue.pop().send_counter] == [0, 1]
+
+
+def test_position_delta_does_not_replace_a_keyframe():
+    queue = MessageQueue(coalesce=True)
+    queue.push(Message("A", MESSAGE_TYPE_PRIORITY.REPORT_POSITION, 0, "F:1:100:200:90", ""))
+    queue.push(Message("A", MESSAGE_TYPE_PRIORITY.REPORT_POSITION, 0, "D:1:1:0:0", ""))
+    queue.push(Message("A", MESSAGE_TYPE_PRIORITY.REPORT_POSITION, 0, "D:1:2:0:0", ""))
+
+    assert [queue.pop().payload, queue.pop().payload] == ["F:1:100:200:90", "D:1:2:0:0"]
+    assert len(queue) == 0
@@ -0,0 +1,27 @@
+from radio import *
+from PositionManager import *
+
+
+class FakeSensors:
+    def __init__(self, pose: Pose):
+        self.pose = pose
+
+    def get_pose(self) -> Pose:
+        return self.pose
+
+
+class FakeMovement:
+    def __init__(self):
+        self.speeds = None
+
+    def set_wheel_speeds(self, left_speed: float, right_speed: float):
+        self.speeds = (left_speed, right_speed)
+
+
+def test_nan_position_does_not_steer():
+    position_manager = PositionManager.__new__(PositionManager)
+    position_manager.sensors = FakeSensors(Pose(0.0, float("nan"), 0.0, 0.0))
+    position_manager.movement_manager = FakeMovement()
+
+    assert position_manager.steer_towards(Coordinates(1.0, 1.0)) is None
+    assert position_manager.movement_manager.speeds is None
@@ -0,0 +1,65 @@
+from radio import *
+
+
+def make_pair(known_robots):
+    clock = [0.0]
+    sender = FakeRobot("A", clock, known_robots)
+    receiver = FakeRobot("B", clock, FleetIndex({"A": MESSAGE_TYPE_PRIORITY.STATUS_FREE}))
+    return clock, sender, receiver, CommunicationManager(sender), CommunicationManager(receiver)
+
+
+def test_reliable_message_is_acknowledged():
+    clock, a, b, manager_a, manager_b = make_pair(FleetIndex({"B": MESSAGE_TYPE_PRIORITY.STATUS_FREE}))
+    manager_a.send_message(Message("A", MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES, 0, "1:2", "B"))
+    assert manager_a.reliable.in_flight() == 1
+
+    for _ in range(5):
+        tick(clock, [a, b], [manager_a, manager_b])
+
+    assert manager_a.reliable.in_flight() == 0
+    assert len(b.list_messages) == 1
+
+
+def test_lost_reliable_message_is_sent_again():
+    clock, a, b, manager_a, manager_b = make_pair(FleetIndex({"B": MESSAGE_TYPE_PRIORITY.STATUS_FREE}))
+    manager_a.send_message(Message("A", MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES, 0, "1:2", "B"))
+    tick(clock, [a, b], [manager_a, manager_b], delivered=False)
+
+    for _ in range(40):
+        tick(clock, [a, b], [manager_a, manager_b])
+
+    assert manager_a.reliable.in_flight() == 0
+    assert len(b.list_messages) == 1
+
+
+def test_no_retransmission_for_unknown_recipient():
+    clock, a, b, manager_a, manager_b = make_pair(FleetIndex({"B": MESSAGE_TYPE_PRIORITY.STATUS_FREE}))
+    manager_a.send_message(Message("A", MESSAGE_TYPE_PRIORITY.STATUS_FREE, 0, "1:2", "toto"))
+    assert manager_a.reliable.in_flight() == 0
+
+    packets = 0
+    for _ in range(400):
+        a.emitter.sent.clear()
+        a.outbox.flush()
+        packets += len(a.emitter.sent)
+        manager_a.receive_message()
+        clock[0] += 0.032
+
+    assert packets == 1
+    assert not manager_a.reliable.outgoing
+
+
+def test_retransmissions_are_delivered_once_without_reliable_channel():
+    clock = [0.0]
+    a = FakeRobot("A", clock, FleetIndex({"B": MESSAGE_TYPE_PRIORITY.STATUS_FREE}))
+    b = FakeRobot("B", clock, FleetIndex({"A": MESSAGE_TYPE_PRIORITY.STATUS_FREE}))
+    b.reliable_unicast = False
+    manager_a, manager_b = CommunicationManager(a), CommunicationManager(b)
+    manager_a.send_message(Message("A", MESSAGE_TYPE_PRIORITY.GO_TO_COORDINATES, 0, "1:2", "B"))
+
+    # Never acknowledged : A sends the message again until it gives up
+    for _ in range(1000):
+        tick(clock, [a, b], [manager_a, manager_b])
+
+    assert manager_a.reliable.in_flight() == 0
+    assert len(b.list_messages) == 1
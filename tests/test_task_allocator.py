@@ -0,0 +1,15 @@
+from TaskAllocator import *
+
+
+def test_robot_without_position_is_skipped():
+    allocator = TaskAllocator(speed=0.5, max_optimal_batch=50)
+    allocator.observe_position("A", 10.0, 10.0)
+
+    assignments = allocator.allocate([Coordinates(0.0, 0.0), Coordinates(0.5, 0.5)], ["A", "B"], 0.0)
+
+    assert [robot for robot, _ in assignments] == ["A", "A"]
+
+
+def test_no_robot_with_position_gives_no_assignment():
+    allocator = TaskAllocator(speed=0.5, max_optimal_batch=50)
+    assert allocator.allocate([Coordinates(0.0, 0.0)], ["A"], 0.0) == []